@@ -0,0 +1,30 @@
+from fastapi import HTTPException, Request, status
+
+from app.core import admission
+from app.core.settings import settings
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+async def admission_control(request: Request):
+    """
+    Holds a read or write slot for the whole request, including a streamed
+    body. Writes have their own budget, so a flood of reads cannot starve
+    them. Requests that cannot be admitted get 503 with Retry-After.
+    """
+    limiter = admission.read_limiter if request.method in READ_METHODS else admission.write_limiter
+    if limiter is None:
+        yield
+        return
+    try:
+        await limiter.acquire()
+    except admission.OverloadedError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service is overloaded, retry later",
+            headers={"Retry-After": str(settings.admission_retry_after_seconds)},
+        )
+    try:
+        yield
+    finally:
+        limiter.release()
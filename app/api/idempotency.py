@@ -0,0 +1,50 @@
+from typing import Annotated
+
+from fastapi import Header, HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import idempotency_services
+from app.services.idempotency_services import IdempotencyRequest
+
+IdempotencyKeyHeader = Annotated[str | None, Header(alias="Idempotency-Key", min_length=1, max_length=255)]
+
+
+def idempotency_request(scope: str, key: str | None, payload: BaseModel) -> IdempotencyRequest | None:
+    if key is None:
+        return None
+    return IdempotencyRequest(scope, key, idempotency_services.request_fingerprint(payload))
+
+
+async def replay_response(idempotency: IdempotencyRequest | None, session: AsyncSession) -> Response | None:
+    """
+    Returns the stored response for the key, or None if there is none.
+    A key reused with a different request body is rejected with 422.
+    """
+    if idempotency is None:
+        return None
+    stored = await idempotency_services.get_stored_response(idempotency, session)
+    if stored is None:
+        return None
+    if stored.request_hash != idempotency.request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request"
+        )
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+async def replay_after_race(idempotency: IdempotencyRequest, session: AsyncSession) -> Response:
+    """Replays the response stored by a concurrent request with the same key."""
+    response = await replay_response(idempotency, session)
+    if response is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is in progress"
+        )
+    return response
@@ -0,0 +1,10 @@
+from fastapi import Response
+from pydantic_core import to_json
+
+
+def rows_response(rows: list[dict], headers: dict[str, str] | None = None) -> Response:
+    """
+    Serializes plain row dicts straight to JSON bytes, skipping response
+    model validation. Rows must already match the documented schema.
+    """
+    return Response(content=to_json(rows), media_type="application/json", headers=headers)
@@ -1,6 +1,12 @@
-from fastapi import APIRouter
-from . import tables, reservations
+from fastapi import APIRouter, Depends
+
+from app.api.admission import admission_control
+from . import events, health, tables, reservations
 
 api_router = APIRouter()
-api_router.include_router(tables.router)
-api_router.include_router(reservations.router)
\ No newline at end of file
+api_router.include_router(tables.router, dependencies=[Depends(admission_control)])
+api_router.include_router(reservations.router, dependencies=[Depends(admission_control)])
+api_router.include_router(health.router)
+# Event streams stay open for as long as the client listens, so they are
+# not counted against the admission budgets.
+api_router.include_router(events.router)
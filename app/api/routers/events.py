@@ -0,0 +1,35 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.core.settings import settings
+from app.services import change_feed
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+
+@router.get("")
+async def get_events(
+    last_event_id: Annotated[str | None, Header(alias="Last-Event-ID")] = None,
+) -> StreamingResponse:
+    """
+    Streams table and reservation changes as Server-Sent Events: "table"
+    and "reservation" events carry the operation and the changed row.
+    Event ids are opaque cursors. A client reconnecting with Last-Event-ID
+    first gets the events it missed, or a "reset" event if they are no
+    longer kept and its lists have to be reloaded.
+    Returns 503 when the feed is disabled with EVENTS_ENABLED=false.
+    """
+    if not settings.events_enabled:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Change feed is disabled"
+        )
+    return StreamingResponse(
+        change_feed.stream_events(last_event_id),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
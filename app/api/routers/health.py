@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, status
+
+from app.core.db import pool_status
+from app.services import warmup
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+@router.get("/pool")
+async def get_pool_status() -> dict:
+    """
+    Returns connection pool usage of the worker that served the request,
+    per engine, with the lag of the read replica when one is configured.
+    """
+    return await pool_status()
+
+@router.get("/ready")
+async def get_readiness() -> dict:
+    """
+    Returns 200 once the worker has warmed up its connections and caches
+    and 503 before that and while shutting down.
+    """
+    if not warmup.ready.is_set():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Not ready"
+        )
+    return {"status": "ready"}
@@ -1,43 +1,200 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+import base64
+from datetime import datetime
+import logging
+import zlib
+from typing import Annotated
+
+from fastapi import APIRouter, Body, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import create_session
-from app.schemas.reservation import Reservation, ReservationCreate
-from app.services import reservation_services as rs, table_services
+from app.api.idempotency import IdempotencyKeyHeader, idempotency_request, replay_after_race, replay_response
+from app.api.responses import rows_response
+from app.api.session import read_session, transaction
+from app.core.db import get_read_sessionmaker
+from app.core.settings import settings
+from app.schemas.reservation import (
+    BulkItemStatus, BulkMode, ExportFormat, Reservation, ReservationBulkResult, ReservationCreate,
+)
+from app.services import reservation_services as rs
+from app.services.idempotency_services import IdempotencyKeyInUseError
+from app.services.reservation_batcher import reservation_batcher
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/reservations", tags=["reservations"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+BULK_MAX_ITEMS = 1000
+
+
+def _encode_cursor(reservation_time: datetime, id: int) -> str:
+    raw = f"{reservation_time.isoformat()}|{id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        reservation_time, id = raw.split("|")
+        after = datetime.fromisoformat(reservation_time), int(id)
+        # Issued cursors hold naive times like the stored ones.
+        if after[0].tzinfo is not None:
+            raise ValueError("cursor time has an offset")
+        return after
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+async def _stream_ndjson(filters: dict, session_factory):
+    # The request session may be closed before the body is sent,
+    # so streaming uses a session of its own.
+    async with session_factory() as session:
+        async for reservation in rs.stream_reservations(session, **filters):
+            yield Reservation.model_validate(reservation).model_dump_json() + "\n"
+
+
+async def _gzip(chunks):
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+async def _stream_csv(filters: dict, session_factory, gzip: bool):
+    async with session_factory() as session:
+        chunks = rs.copy_reservations_csv(session, **filters)
+        try:
+            async for chunk in (_gzip(chunks) if gzip else chunks):
+                yield chunk
+        except Exception as e:
+            # Headers are already sent: the client gets a truncated body.
+            logger.error(f"Error exporting reservations: {e}")
+            raise
+
+
 @router.get("/")
-async def get_reservation(session: AsyncSession = Depends(create_session)) -> list[Reservation]:
-    reservations = await rs.get_reservations(session)
+async def get_reservation(
+    response: Response,
+    table_id: int | None = None,
+    time_from: datetime | None = None,
+    time_to: datetime | None = None,
+    location: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    stream: bool = False,
+    session: AsyncSession = read_session(),
+) -> list[Reservation]:
+    """
+    Returns reservations ordered by time. The next page cursor is sent in
+    the X-Next-Cursor header. With stream=true every matching reservation
+    is streamed as NDJSON and pagination parameters are ignored.
+    """
+    filters = {
+        "table_id": table_id,
+        "time_from": time_from,
+        "time_to": time_to,
+        "location": location,
+    }
+    if stream:
+        session_factory = await get_read_sessionmaker()
+        return StreamingResponse(_stream_ndjson(filters, session_factory), media_type=NDJSON_MEDIA_TYPE)
+
+    after = _decode_cursor(cursor) if cursor else None
+    if settings.json_fast_path:
+        reservations = await rs.get_reservation_rows(session, after=after, limit=limit + 1, **filters)
+    else:
+        reservations = await rs.get_reservations(session, after=after, limit=limit + 1, **filters)
     if not reservations:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Reservations not found"
         )
+    headers = {}
+    if len(reservations) > limit:
+        reservations = reservations[:limit]
+        last = reservations[-1]
+        if settings.json_fast_path:
+            headers["X-Next-Cursor"] = _encode_cursor(last["reservation_time"], last["id"])
+        else:
+            headers["X-Next-Cursor"] = _encode_cursor(last.reservation_time, last.id)
+
+    if settings.json_fast_path:
+        return rows_response(reservations, headers)
+    response.headers.update(headers)
     return reservations
 
-@router.post("/")
-async def create_reservation(reservation: ReservationCreate, session: AsyncSession = Depends(create_session)) -> Reservation:
-    is_table_exists = await table_services.get_table_by_id(reservation.table_id, session)
-    if not is_table_exists:
+@router.get("/export")
+async def export_reservations(
+    format: ExportFormat = ExportFormat.csv,
+    time_from: datetime | None = Query(default=None, alias="from"),
+    time_to: datetime | None = Query(default=None, alias="to"),
+    gzip: bool = False,
+) -> StreamingResponse:
+    """
+    Streams reservations with reservation_time in [from, to) ordered by time
+    as a CSV file straight from Postgres COPY. With gzip=true the file is
+    compressed while it streams.
+    """
+    if time_from is not None and time_to is not None and time_to.replace(tzinfo=None) < time_from.replace(tzinfo=None):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Table with id {reservation.table_id} not found"
+            detail="from must not be later than to"
         )
-    is_time_conflicts = await rs.check_reservation_conflict(
-        reservation.reservation_time,
-        reservation.duration_minutes,
-        reservation.table_id,
-        session
+    filename = f"reservations.{format.value}"
+    media_type = "text/csv"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    session_factory = await get_read_sessionmaker()
+    return StreamingResponse(
+        _stream_csv({"time_from": time_from, "time_to": time_to}, session_factory, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
-    if is_time_conflicts:
+
+@router.post("/")
+async def create_reservation(
+    reservation: ReservationCreate,
+    idempotency_key: IdempotencyKeyHeader = None,
+    session: AsyncSession = transaction(),
+) -> Reservation:
+    """
+    Creates a reservation. A retry with the same Idempotency-Key gets the
+    stored response of the first successful attempt. With group commit
+    enabled, requests without a key are inserted together with the other
+    reservations arriving in the same window.
+    """
+    idempotency = idempotency_request("reservations", idempotency_key, reservation)
+    replay = await replay_response(idempotency, session)
+    if replay is not None:
+        return replay
+    try:
+        if reservation_batcher is not None and idempotency is None:
+            reservation = await reservation_batcher.submit(reservation)
+        else:
+            reservation = await rs.create_reservation(reservation, session, idempotency)
+    except IdempotencyKeyInUseError:
+        return await replay_after_race(idempotency, session)
+    except rs.TableNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Table with id {reservation.table_id} not found"
+        )
+    except rs.ReservationConflictError:
+        # A concurrent request with the same key may have booked this slot.
+        replay = await replay_response(idempotency, session)
+        if replay is not None:
+            return replay
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
             detail="Time conflicts. This table is already reserved at this time"
         )
-    reservation = await rs.create_reservation(reservation, session)
     if not reservation:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -45,8 +202,39 @@ async def create_reservation(reservation: ReservationCreate, session: AsyncSessi
         )
     return reservation
 
+@router.post("/bulk")
+async def create_reservations(
+    reservations: Annotated[list[ReservationCreate], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    mode: BulkMode = BulkMode.atomic,
+    session: AsyncSession = transaction(),
+) -> list[ReservationBulkResult]:
+    """
+    Creates up to BULK_MAX_ITEMS reservations at once. In atomic mode the
+    batch is rejected with 409 unless every item can be created; in partial
+    mode every item that can be created is, and each result reports its status.
+    """
+    atomic = mode == BulkMode.atomic
+    try:
+        results = await rs.create_reservations(reservations, atomic, session)
+    except rs.TableNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Table not found"
+        )
+    except rs.ReservationConflictError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Time conflicts. This table is already reserved at this time"
+        )
+    if atomic and any(result.status != BulkItemStatus.created for result in results):
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content=[result.model_dump(mode="json") for result in results]
+        )
+    return results
+
 @router.delete("/{id}")
-async def delete_reservation(id: int, session: AsyncSession = Depends(create_session)) -> JSONResponse:
+async def delete_reservation(id: int, session: AsyncSession = transaction()) -> JSONResponse:
     result = await rs.delete_reservation_by_id(id, session)
     if not result:
         raise HTTPException(
@@ -1,35 +1,165 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date, datetime
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import create_session
-from app.schemas.table import TableCreate, Table
+from app.api.idempotency import IdempotencyKeyHeader, idempotency_request, replay_after_race, replay_response
+from app.api.responses import rows_response
+from app.api.session import read_session, transaction
+from app.core.db import on_commit
+from app.core.settings import settings
+from app.schemas.reservation import MAX_DURATION_MINUTES
+from app.schemas.table import Granularity, TableCreate, Table, TableDaySchedule, TableUtilization
 from app.services import table_services
+from app.services.idempotency_services import IdempotencyKeyInUseError
+from app.services.tables_catalog import tables_catalog
 
 router = APIRouter(prefix="/tables", tags=["tables"])
 
+
+def _etag_matches(etag: str, if_none_match: str | None) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
 @router.get("/")
-async def get_tables(session: AsyncSession = Depends(create_session)) -> list[Table]:
-    tables = await table_services.get_tables(session)
+async def get_tables(request: Request, session: AsyncSession = read_session()) -> list[Table]:
+    """
+    Returns all tables. With TABLES_CACHE_ENABLED the serialized response is
+    cached per worker and sent with a strong ETag; a matching If-None-Match
+    gets 304 Not Modified.
+    """
+    if settings.tables_cache_enabled:
+        snapshot = await tables_catalog.get(session)
+        if snapshot.is_empty:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Tables not found"
+            )
+        headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+        if _etag_matches(snapshot.etag, request.headers.get("If-None-Match")):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+    if settings.json_fast_path:
+        tables = await table_services.get_table_rows(session)
+    else:
+        tables = await table_services.get_tables(session)
     if not tables:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tables not found"
         )
+    if settings.json_fast_path:
+        return rows_response(tables)
+    return tables
+
+@router.get("/availability")
+async def get_available_tables(
+    start: datetime,
+    duration: int = Query(ge=1, le=MAX_DURATION_MINUTES),
+    seats: int = Query(default=1, ge=1),
+    location: str | None = None,
+    session: AsyncSession = read_session(),
+) -> list[Table]:
+    tables = await table_services.get_available_tables(start, duration, seats, location, session)
+    if not tables:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Available tables not found"
+        )
     return tables
 
+@router.get("/utilization")
+async def get_utilization(
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    granularity: Granularity = Granularity.day,
+    location: str | None = None,
+    session: AsyncSession = read_session(),
+) -> list[TableUtilization]:
+    """
+    Returns booked minutes, reservation count and occupancy per table for
+    every day, week or month between from and to (inclusive), read from
+    pre-aggregated daily rows.
+    """
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from must not be later than to"
+        )
+    utilization = await table_services.get_utilization(date_from, date_to, granularity, location, session)
+    if not utilization:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Utilization not found"
+        )
+    return utilization
+
+@router.get("/schedule")
+async def get_floor_schedule(
+    day: date = Query(alias="date"),
+    location: str | None = None,
+    session: AsyncSession = read_session(),
+) -> list[TableDaySchedule]:
+    """Returns busy and free intervals of every table on a day."""
+    schedules = await table_services.get_floor_schedule(day, location, session)
+    if not schedules:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tables not found"
+        )
+    return schedules
+
+@router.get("/{id}/schedule")
+async def get_table_schedule(
+    id: int,
+    day: date = Query(alias="date"),
+    session: AsyncSession = read_session(),
+) -> TableDaySchedule:
+    """
+    Returns the merged busy intervals and the free slots of a table on a
+    day, in SLOT_MINUTES-minute slots.
+    """
+    schedule = await table_services.get_table_schedule(id, day, session)
+    if schedule is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Table with id {id} not found"
+        )
+    return schedule
+
 @router.post("/")
-async def create_table(table: TableCreate, session: AsyncSession = Depends(create_session)) -> Table:
-    db_table = await table_services.create_table(table, session)
+async def create_table(
+    table: TableCreate,
+    idempotency_key: IdempotencyKeyHeader = None,
+    session: AsyncSession = transaction(),
+) -> Table:
+    """
+    Creates a table. A retry with the same Idempotency-Key gets the
+    stored response of the first successful attempt.
+    """
+    idempotency = idempotency_request("tables", idempotency_key, table)
+    replay = await replay_response(idempotency, session)
+    if replay is not None:
+        return replay
+    try:
+        db_table = await table_services.create_table(table, session, idempotency)
+    except IdempotencyKeyInUseError:
+        return await replay_after_race(idempotency, session)
     if not db_table:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Table not created"
         )
+    on_commit(session, tables_catalog.invalidate)
     return db_table
 
 @router.delete("/{id}")
-async def delete_table(id: int, session: AsyncSession = Depends(create_session)) -> JSONResponse:
+async def delete_table(id: int, session: AsyncSession = transaction()) -> JSONResponse:
     table_deleted = await table_services.delete_table_by_id(id, session)
     if not table_deleted:
         raise HTTPException(
@@ -37,6 +167,7 @@ async def delete_table(id: int, session: AsyncSession = Depends(create_session))
             detail=f"Table with id {id} not found"
         )
 
+    on_commit(session, tables_catalog.invalidate)
     return JSONResponse(
         status_code=status.HTTP_200_OK,
         content={"message": f"Table with id {id} deleted"}
@@ -0,0 +1,25 @@
+import inspect
+
+from fastapi import Depends
+
+from app.core.db import create_read_session, create_session
+
+# Since FastAPI 0.121 the exit code of a yield dependency runs after the
+# response is sent unless the dependency is scoped to the endpoint function.
+# Earlier versions run it before sending.
+_FUNCTION_SCOPE = {"scope": "function"} if "scope" in inspect.signature(Depends).parameters else {}
+
+
+def transaction():
+    """
+    Depends() on a session wrapping the endpoint in one transaction.
+    It is committed as soon as the endpoint returns, before the response
+    is sent, so the client never sees a success that failed to commit and
+    the connection goes back to the pool early.
+    """
+    return Depends(create_session, **_FUNCTION_SCOPE)
+
+
+def read_session():
+    """Depends() on a read-only session released as soon as the endpoint returns."""
+    return Depends(create_read_session, **_FUNCTION_SCOPE)
@@ -0,0 +1,72 @@
+"""
+Maintenance commands:
+
+    python -m app.cli partitions --ahead 3 --retention-months 24 [--drop]
+    python -m app.cli import tables|reservations FILE [--format csv|ndjson] [--batch-size 5000]
+
+Database settings are taken from the same environment variables as the app.
+"""
+import argparse
+import asyncio
+from pathlib import Path
+import sys
+
+from app.core.db import engine, unit_of_work
+from app.core.settings import settings
+from app.services import import_services, partition_services
+from app.services.import_services import ImportFormat
+
+
+async def partitions(months_ahead: int, retention_months: int | None, drop: bool) -> None:
+    async with unit_of_work() as session:
+        created, detached = await partition_services.maintain_partitions(
+            months_ahead, retention_months, session, drop=drop
+        )
+    await engine.dispose()
+    print(f"Created partitions: {', '.join(created) or 'none'}")
+    print(f"{'Dropped' if drop else 'Detached'} partitions: {', '.join(detached) or 'none'}")
+
+
+async def import_file(kind: str, path: Path, format: ImportFormat, batch_size: int) -> None:
+    import_rows = import_services.import_tables if kind == "tables" else import_services.import_reservations
+    with path.open(newline="", encoding="utf-8") as file:
+        async with unit_of_work() as session:
+            report = await import_rows(import_services.read_rows(file, format), session, batch_size)
+    await engine.dispose()
+    for line, reason in sorted(report.rejected.items()):
+        print(f"{path}:{line}: {reason}", file=sys.stderr)
+    print(f"Imported {kind}: {report.imported}, rejected: {len(report.rejected)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    partitions_parser = commands.add_parser(
+        "partitions", help="create upcoming reservation partitions and detach expired ones"
+    )
+    partitions_parser.add_argument("--ahead", type=int, default=settings.partitions_ahead_months)
+    partitions_parser.add_argument("--retention-months", type=int, default=settings.partition_retention_months)
+    partitions_parser.add_argument("--drop", action="store_true", help="drop expired partitions instead of keeping them")
+
+    import_parser = commands.add_parser(
+        "import", help="load tables or reservations from a CSV (with a header row) or NDJSON file"
+    )
+    import_parser.add_argument("kind", choices=["tables", "reservations"])
+    import_parser.add_argument("file", type=Path)
+    import_parser.add_argument(
+        "--format", type=ImportFormat, choices=[format.value for format in ImportFormat],
+        help="file format, by default taken from the file extension",
+    )
+    import_parser.add_argument("--batch-size", type=int, default=import_services.IMPORT_BATCH_SIZE)
+
+    args = parser.parse_args()
+    if args.command == "partitions":
+        asyncio.run(partitions(args.ahead, args.retention_months, args.drop))
+    elif args.command == "import":
+        format = args.format or (ImportFormat.ndjson if args.file.suffix in (".ndjson", ".jsonl") else ImportFormat.csv)
+        asyncio.run(import_file(args.kind, args.file, format, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
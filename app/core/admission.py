@@ -0,0 +1,60 @@
+import asyncio
+
+from app.core.metrics import admission_rejected_total
+from app.core.settings import settings
+
+
+class OverloadedError(Exception):
+    """
+    Raised when a request cannot be admitted: the wait queue is full or
+    the queue deadline passed.
+    """
+
+
+class AdmissionLimiter:
+    """
+    Per-worker concurrency limit with a bounded wait queue. Requests over
+    the limit wait up to queue_timeout seconds for a slot; when queue_size
+    requests are already waiting, new ones are rejected immediately.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float) -> None:
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(limit)
+        self._waiting = 0
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    async def acquire(self) -> None:
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return
+        if self._waiting >= self.queue_size:
+            admission_rejected_total.labels(self.name, "queue_full").inc()
+            raise OverloadedError(f"{self.name} queue is full")
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            admission_rejected_total.labels(self.name, "timeout").inc()
+            raise OverloadedError(f"{self.name} queue deadline exceeded")
+        finally:
+            self._waiting -= 1
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+
+def _limiter(name: str, limit: int | None, queue_size: int) -> AdmissionLimiter | None:
+    if limit is None:
+        return None
+    return AdmissionLimiter(name, limit, queue_size, settings.admission_queue_timeout_seconds)
+
+
+read_limiter = _limiter("read", settings.admission_read_limit, settings.admission_read_queue_size)
+write_limiter = _limiter("write", settings.admission_write_limit, settings.admission_write_queue_size)
@@ -1,6 +1,19 @@
+import asyncio
+from contextlib import asynccontextmanager
 import logging
+import os
+import time
+from typing import Callable
+from sqlalchemy import event, text
+from sqlalchemy.engine.interfaces import CacheStats
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
+from app.core.metrics import (
+    db_compiled_cache_total, db_pool_checked_out, db_pool_queue_wait_seconds, db_query_duration_seconds,
+    histogram_snapshot, statement_label,
+)
 from app.core.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -8,18 +21,233 @@ logger = logging.getLogger(__name__)
 class Base(DeclarativeBase):
     pass
 
-engine = create_async_engine(
-        url=settings.db_dsn,
+class TimedQueue(AsyncAdaptedQueue):
+    """
+    Pool queue that records how long each checkout waits for an idle
+    connection. Opening new connections and the pre-ping are not included.
+    Subclassed per engine with the engine's series in wait_seconds.
+    """
+    wait_seconds = None
+
+    def get(self, block=True, timeout=None):
+        started = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            self.wait_seconds.observe(time.perf_counter() - started)
+
+def _pool_class(name: str) -> type[AsyncAdaptedQueuePool]:
+    """
+    Returns a pool class recording queue waits under the engine name.
+    The name lives on the class, so it survives the pool being recreated.
+    """
+    queue_class = type(f"TimedQueue_{name}", (TimedQueue,), {
+        "wait_seconds": db_pool_queue_wait_seconds.labels(name),
+    })
+    return type(f"InstrumentedPool_{name}", (AsyncAdaptedQueuePool,), {"_queue_class": queue_class})
+
+def _create_engine(url, name: str):
+    engine = create_async_engine(
+        url=url,
         echo=settings.db_echo,
+        poolclass=_pool_class(name),
         pool_pre_ping=settings.db_pool_pre_ping,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        connect_args={
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            # Read by change_event_emit: writes of this app are not logged or sent.
+            "server_settings": {} if settings.events_enabled else {"app.change_feed": "off"},
+        },
     )
+    checked_out = db_pool_checked_out.labels(name)
+
+    def count_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_out.inc()
+
+    def count_checkin(dbapi_connection, connection_record):
+        checked_out.dec()
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _start_query_timer)
+    event.listen(engine.sync_engine, "after_cursor_execute", _record_query_time)
+    event.listen(engine.sync_engine, "checkout", count_checkout)
+    event.listen(engine.sync_engine, "checkin", count_checkin)
+    return engine
+
+
+CACHE_RESULTS = {
+    CacheStats.CACHE_HIT: "hit",
+    CacheStats.CACHE_MISS: "miss",
+    CacheStats.CACHING_DISABLED: "disabled",
+    CacheStats.NO_CACHE_KEY: "no_key",
+    CacheStats.NO_DIALECT_SUPPORT: "unsupported",
+}
+
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context.query_started = time.perf_counter()
+
+
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.query_started
+    label = statement_label(statement, context.execution_options)
+    db_query_duration_seconds.labels(label).observe(elapsed)
+    db_compiled_cache_total.labels(label, CACHE_RESULTS.get(context.cache_hit, "no_key")).inc()
+
+
+
+engine = _create_engine(settings.db_dsn, "primary")
+read_engine = _create_engine(settings.db_read_dsn, "replica") if settings.db_read_dsn else None
+
 async_sessionmaker = sessionmaker(bind=engine, expire_on_commit=False, autoflush=False, class_=AsyncSession)
 
-async def  create_session():
-    """Create async session
+
+
+@asynccontextmanager
+async def unit_of_work(factory: sessionmaker | None = None):
+    """
+    Yields a session whose work is committed once when the block exits
+    and rolled back if it raises. The session checks out a connection
+    only when it runs its first statement.
+    """
+    async with (factory or async_sessionmaker)() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+        await session.commit()
+
+
+async def create_session():
+    """Create async session wrapping the endpoint in one transaction
+    """
+    async with unit_of_work() as session:
+        yield session
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Runs callback after the session's current transaction commits;
+    it is dropped if the transaction rolls back.
+    """
+    session.info.setdefault("on_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit(session):
+    # Also fired when a savepoint is released.
+    if session.in_nested_transaction():
+        return
+    for callback in session.info.pop("on_commit", []):
+        callback()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_on_commit(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop("on_commit", None)
+
+
+class ReplicaLagMonitor:
+    """
+    Measures the replay lag of the read replica at most once per
+    check_interval seconds. A replica that cannot be reached counts as
+    lagging.
+    """
+
+    def __init__(self, engine, check_interval: float, timeout: float = 1) -> None:
+        self.engine = engine
+        self.check_interval = check_interval
+        self.timeout = timeout
+        self._lag = float("inf")
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def _query_lag(self) -> float:
+        # An idle primary sends no new WAL, so a fully replayed replica has no lag
+        # however old its last replayed transaction is - unless it is not
+        # receiving WAL at all. The status is only visible to roles with
+        # pg_read_all_stats (e.g. pg_monitor); otherwise the replica counts
+        # as lagging.
+        query = text("""
+            SELECT CASE
+                WHEN NOT pg_is_in_recovery() THEN 0
+                WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL
+                WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+            END
+        """).execution_options(query_label="replica_lag")
+        async with self.engine.connect() as conn:
+            lag = await conn.scalar(query)
+        return float("inf") if lag is None else float(lag)
+
+    async def _measure(self) -> float:
+        # Requests wait on the lock meanwhile, so a hanging replica must not
+        # hold it for the pool timeout.
+        try:
+            return await asyncio.wait_for(self._query_lag(), self.timeout)
+        except Exception as e:
+            logger.error(f"Error checking replica lag: {e!r}")
+            return float("inf")
+
+    async def lag(self) -> float:
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return self._lag
+        async with self._lock:
+            if time.monotonic() - self._checked_at >= self.check_interval:
+                self._lag = await self._measure()
+                self._checked_at = time.monotonic()
+        return self._lag
+
+
+read_sessionmaker = sessionmaker(
+    bind=read_engine, expire_on_commit=False, autoflush=False, class_=AsyncSession
+) if read_engine is not None else None
+replica_lag = ReplicaLagMonitor(
+    read_engine, settings.db_read_lag_check_interval_seconds, settings.db_read_lag_check_timeout_seconds
+) if read_engine is not None else None
+
+
+async def get_read_sessionmaker() -> sessionmaker:
+    """
+    Returns the replica session factory, or the primary one when no replica
+    is configured or it lags more than db_read_max_lag_seconds.
     """
-    logger.info("Creating session")
-    async with async_sessionmaker() as session:
-        logger.info("Session initialized")
+    if read_sessionmaker is None or await replica_lag.lag() > settings.db_read_max_lag_seconds:
+        return async_sessionmaker
+    return read_sessionmaker
+
+
+async def create_read_session():
+    """Create async session for read-only endpoints
+    """
+    factory = await get_read_sessionmaker()
+    async with factory() as session:
         yield session
-        logger.info("Session closed")
\ No newline at end of file
+
+def _pool_usage(name: str, pool) -> dict:
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "queue_wait_seconds": histogram_snapshot(db_pool_queue_wait_seconds, engine=name),
+    }
+
+async def pool_status() -> dict:
+    """
+    Returns usage of the primary and replica pools of the current worker.
+    The replica also reports its lag (None when it cannot be reached) and
+    whether reads are currently routed to it.
+    """
+    status = {"pid": os.getpid(), "primary": _pool_usage("primary", engine.pool)}
+    if read_engine is not None:
+        lag = await replica_lag.lag()
+        status["replica"] = _pool_usage("replica", read_engine.pool) | {
+            "lag_seconds": lag if lag != float("inf") else None,
+            "serving_reads": lag <= settings.db_read_max_lag_seconds,
+        }
+    return status
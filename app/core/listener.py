@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from typing import Callable
+
+import asyncpg
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY_SECONDS = 1.0
+
+
+class PgListener:
+    """
+    Keeps one dedicated LISTEN connection per worker and dispatches
+    Postgres notifications to in-process subscribers.
+    Reset callbacks run after every (re)connect, because notifications
+    sent while the connection was down are lost.
+    """
+
+    def __init__(self) -> None:
+        self._callbacks: dict[str, list[Callable[[str], None]]] = {}
+        self._reset_callbacks: list[Callable[[], None]] = []
+        self._task: asyncio.Task | None = None
+        self._connected = False
+        self._connected_event = asyncio.Event()
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> None:
+        self._callbacks.setdefault(channel, []).append(callback)
+
+    def on_reset(self, callback: Callable[[], None]) -> None:
+        self._reset_callbacks.append(callback)
+
+    @property
+    def is_connected(self) -> bool:
+        """True while notifications are being received."""
+        return self._connected
+
+    async def wait_connected(self) -> None:
+        await self._connected_event.wait()
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if not self._callbacks or self.is_running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _dispatch(self, connection, pid: int, channel: str, payload: str) -> None:
+        for callback in self._callbacks.get(channel, []):
+            try:
+                callback(payload)
+            except Exception as e:
+                logger.error(f"Error handling notification on {channel}: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.error(f"Listener connection failed: {e}")
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    async def _listen(self) -> None:
+        connection = await asyncpg.connect(
+            host=settings.db_host,
+            port=settings.db_port,
+            user=settings.db_user,
+            password=settings.db_password,
+            database=settings.db_database,
+        )
+        try:
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            for channel in self._callbacks:
+                await connection.add_listener(channel, self._dispatch)
+            for callback in self._reset_callbacks:
+                callback()
+            self._connected = True
+            self._connected_event.set()
+            logger.info(f"Listening on {', '.join(self._callbacks)}")
+            await closed.wait()
+            logger.warning("Listener connection lost, reconnecting")
+        finally:
+            self._connected = False
+            self._connected_event.clear()
+            if not connection.is_closed():
+                await connection.close()
+
+
+listener = PgListener()
@@ -0,0 +1,142 @@
+import os
+import re
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+    Histogram as PrometheusHistogram, generate_latest, multiprocess,
+)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+STATEMENT_PATTERN = re.compile(
+    r"^\s*(select|insert|update|delete|with)\b.*?\b(?:from|into|update)\s+\"?(\w+)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+# With PROMETHEUS_MULTIPROC_DIR set, every worker writes its samples to that
+# directory and /metrics merges them, so a scrape of any worker sees all of them.
+http_request_duration_seconds = PrometheusHistogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+http_requests_total = Counter(
+    "http_requests_total",
+    "HTTP responses by route and status code",
+    ["method", "route", "status"],
+)
+db_query_duration_seconds = PrometheusHistogram(
+    "db_query_duration_seconds",
+    "Database statement latency by label",
+    ["label"],
+    buckets=LATENCY_BUCKETS,
+)
+db_pool_queue_wait_seconds = PrometheusHistogram(
+    "db_pool_queue_wait_seconds",
+    "Time spent waiting in the pool queue for an idle connection",
+    ["engine"],
+    buckets=LATENCY_BUCKETS,
+)
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+db_compiled_cache_total = Counter(
+    "db_compiled_cache_total",
+    "Statement executions by label and SQLAlchemy compiled cache outcome",
+    ["label", "result"],
+)
+admission_rejected_total = Counter(
+    "admission_rejected_total",
+    "Requests shed by admission control",
+    ["budget", "reason"],
+)
+
+
+def histogram_snapshot(histogram: PrometheusHistogram, **labels: str) -> dict:
+    """
+    Returns the cumulative buckets, count and sum this worker recorded
+    in the series with the given labels.
+    """
+    snapshot = {"count": 0, "sum": 0.0, "buckets": {}}
+    for metric in histogram.collect():
+        for sample in metric.samples:
+            if any(sample.labels.get(name) != value for name, value in labels.items()):
+                continue
+            if sample.name.endswith("_bucket"):
+                snapshot["buckets"][sample.labels["le"]] = int(sample.value)
+            elif sample.name.endswith("_count"):
+                snapshot["count"] = int(sample.value)
+            elif sample.name.endswith("_sum"):
+                snapshot["sum"] = sample.value
+    return snapshot
+
+
+def statement_label(statement: str, execution_options: dict) -> str:
+    """
+    Returns the metrics label of a statement: the query_label execution
+    option when set, otherwise "<verb>_<table>" taken from the SQL text.
+    """
+    label = execution_options.get("query_label")
+    if label:
+        return label
+    match = STATEMENT_PATTERN.match(statement)
+    if not match:
+        return "other"
+    return f"{match.group(1).lower()}_{match.group(2).lower()}"
+
+
+def render_metrics() -> bytes:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
+
+
+def mark_worker_dead() -> None:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and status code of every HTTP request,
+    labelled with the route template so path parameters do not add series.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_request_duration_seconds.labels(method, route_path).observe(
+                time.perf_counter() - started
+            )
+            http_requests_total.labels(method, route_path, str(status_code)).inc()
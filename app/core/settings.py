@@ -16,7 +16,50 @@ class Settngs(BaseSettings):
 
     db_echo: bool = False
     db_pool_pre_ping: bool = True
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = -1
+    db_statement_cache_size: int = 100
+    db_read_dsn: str | None = None
+    db_read_max_lag_seconds: float = 5
+    db_read_lag_check_interval_seconds: float = 1
+    db_read_lag_check_timeout_seconds: float = 1
 
+    json_fast_path: bool = False
+    tables_cache_enabled: bool = False
+
+    conflict_index_enabled: bool = False
+    conflict_index_horizon_hours: int = 7 * 24
+    conflict_index_ttl_seconds: int = 300
+
+    partitions_ahead_months: int = 3
+    partition_retention_months: int | None = None
+    partition_maintenance_on_startup: bool = False
+
+    idempotency_key_ttl_seconds: int = 24 * 60 * 60
+    idempotency_cleanup_interval_seconds: int = 600
+
+    admission_read_limit: int | None = None
+    admission_write_limit: int | None = None
+    admission_read_queue_size: int = 100
+    admission_write_queue_size: int = 100
+    admission_queue_timeout_seconds: float = 1.0
+    admission_retry_after_seconds: int = 1
+
+    group_commit_enabled: bool = False
+    group_commit_window_ms: float = 2
+    group_commit_max_batch: int = 100
+
+    events_enabled: bool = True
+    events_queue_size: int = 1000
+    events_keepalive_seconds: float = 15
+    events_retention_seconds: int = 24 * 60 * 60
+    events_prune_interval_seconds: int = 600
+
+    warmup_enabled: bool = False
+    warmup_connections: int | None = None
+    warmup_timeout_seconds: float = 10
 
     @property
     def db_dsn(self) -> URL:
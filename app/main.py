@@ -1,13 +1,73 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from starlette.middleware.cors import CORSMiddleware
 
+from app.core.db import unit_of_work
+from app.core.listener import listener
+from app.core.metrics import METRICS_CONTENT_TYPE, MetricsMiddleware, mark_worker_dead, render_metrics
 from app.core.settings import settings
 from app.api.routers import api_router
+from app.services import (
+    change_feed, idempotency_services, partition_services, reservation_batcher, reservation_index, tables_catalog,
+    warmup,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.partition_maintenance_on_startup:
+        async with unit_of_work() as session:
+            await partition_services.maintain_partitions(
+                settings.partitions_ahead_months, settings.partition_retention_months, session
+            )
+    index = reservation_index.reservation_index
+    if index is not None:
+        listener.subscribe(reservation_index.CHANNEL, index.handle_notification)
+        listener.on_reset(index.clear)
+    if settings.tables_cache_enabled:
+        catalog = tables_catalog.tables_catalog
+        listener.subscribe(tables_catalog.CHANNEL, catalog.handle_notification)
+        listener.on_reset(catalog.invalidate)
+    if settings.events_enabled:
+        listener.subscribe(change_feed.CHANNEL, change_feed.change_feed.handle_notification)
+        listener.on_reset(change_feed.change_feed.reset)
+    await listener.start()
+    cleanup = None
+    if settings.idempotency_cleanup_interval_seconds > 0:
+        cleanup = asyncio.create_task(
+            idempotency_services.cleanup_periodically(settings.idempotency_cleanup_interval_seconds)
+        )
+    prune = None
+    if settings.events_enabled and settings.events_prune_interval_seconds > 0:
+        prune = asyncio.create_task(change_feed.prune_periodically(
+            settings.events_prune_interval_seconds, settings.events_retention_seconds
+        ))
+    warm_up = None
+    if settings.warmup_enabled:
+        # Startup waits for the first attempt only; failed ones are retried in the background.
+        warm_up = asyncio.create_task(warmup.warm_up_until_ready())
+        await asyncio.wait({warm_up}, timeout=settings.warmup_timeout_seconds)
+    else:
+        warmup.ready.set()
+    yield
+    warmup.ready.clear()
+    background = [task for task in (warm_up, cleanup, prune) if task is not None]
+    for task in background:
+        task.cancel()
+    # Let them unwind before the connections they use are closed.
+    await asyncio.gather(*background, return_exceptions=True)
+    if reservation_batcher.reservation_batcher is not None:
+        await reservation_batcher.reservation_batcher.close()
+    await listener.stop()
+    mark_worker_dead()
 
 
 app = FastAPI(
     title=settings.project_name,
     debug=settings.debug,
+    lifespan=lifespan,
     )
 
 app.add_middleware(
@@ -18,7 +78,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router, prefix="/api")
 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 if __name__ == "__main__":
     pass
@@ -8,7 +8,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 
 from app.core.db import Base
-from app.models import Table, Reservation  # noqa
+from app.models import CatalogVersion, ChangeEvent, IdempotencyKey, Table, TableDaySlots, TableUtilizationDaily, Reservation  # noqa
 from app.core.settings import settings
 
 
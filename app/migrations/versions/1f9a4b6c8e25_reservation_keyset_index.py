@@ -0,0 +1,33 @@
+"""Reservation keyset pagination index
+
+Revision ID: 1f9a4b6c8e25
+Revises: 8d3f6a0e27b4
+Create Date: 2026-10-18 12:21:07.553841
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1f9a4b6c8e25'
+down_revision: Union[str, None] = '8d3f6a0e27b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_reservation_time_id',
+        'reservation',
+        ['reservation_time', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reservation_time_id', table_name='reservation')
@@ -0,0 +1,115 @@
+"""Change event log
+
+Revision ID: 3c8f0a6d2e91
+Revises: 9e2f5b7c1d48
+Create Date: 2026-10-18 20:31:47.602915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c8f0a6d2e91'
+down_revision: Union[str, None] = '9e2f5b7c1d48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('change_event',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('op', sa.String(), nullable=False),
+    sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('xid', sa.BigInteger(), nullable=False),
+    sa.Column('xmin', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_change_event_created_at'), 'change_event', ['created_at'], unique=False)
+    op.create_index(op.f('ix_change_event_xid'), 'change_event', ['xid'], unique=False)
+    # The event is logged for resuming clients and sent whole, so listeners
+    # never query it back. Notifications are delivered in commit order.
+    # Ids are taken before commit and may commit out of order, so resuming
+    # relies on xid (the writing transaction) and xmin (every transaction
+    # below it had finished when the event was written) instead.
+    # Connections opened with app.change_feed = off (EVENTS_ENABLED=false)
+    # skip both the log and the notification.
+    op.execute("""
+        CREATE FUNCTION change_event_emit(p_entity text, p_op text, p_data jsonb) RETURNS void AS $$
+        DECLARE
+            e change_event;
+        BEGIN
+            IF current_setting('app.change_feed', true) = 'off' THEN
+                RETURN;
+            END IF;
+            INSERT INTO change_event (entity, op, data, xid, xmin)
+            VALUES (p_entity, p_op, p_data, txid_current(), txid_snapshot_xmin(txid_current_snapshot()))
+            RETURNING * INTO e;
+            PERFORM pg_notify('change_event', json_build_object(
+                'id', e.id, 'entity', e.entity, 'op', e.op, 'data', e.data, 'xid', e.xid, 'xmin', e.xmin
+            )::text);
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE FUNCTION reservation_emit_change() RETURNS trigger AS $$
+        DECLARE
+            r reservation;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                r := OLD;
+            ELSE
+                r := NEW;
+            END IF;
+            PERFORM change_event_emit('reservation', TG_OP, jsonb_build_object(
+                'id', r.id, 'table_id', r.table_id, 'start', r.reservation_time, 'end', r.end_time
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER reservation_emit_change
+        AFTER INSERT OR DELETE OR UPDATE ON reservation
+        FOR EACH ROW EXECUTE FUNCTION reservation_emit_change()
+    """)
+    op.execute("""
+        CREATE FUNCTION table_emit_change() RETURNS trigger AS $$
+        DECLARE
+            t "table";
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                t := OLD;
+            ELSE
+                t := NEW;
+            END IF;
+            PERFORM change_event_emit('table', TG_OP, jsonb_build_object(
+                'id', t.id, 'name', t.name, 'seats', t.seats, 'location', t.location
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER table_emit_change
+        AFTER INSERT OR DELETE OR UPDATE ON "table"
+        FOR EACH ROW EXECUTE FUNCTION table_emit_change()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER table_emit_change ON "table"')
+    op.execute("DROP FUNCTION table_emit_change()")
+    op.execute("DROP TRIGGER reservation_emit_change ON reservation")
+    op.execute("DROP FUNCTION reservation_emit_change()")
+    op.execute("DROP FUNCTION change_event_emit(text, text, jsonb)")
+    op.drop_index(op.f('ix_change_event_xid'), table_name='change_event')
+    op.drop_index(op.f('ix_change_event_created_at'), table_name='change_event')
+    op.drop_table('change_event')
@@ -0,0 +1,47 @@
+"""Reservation period and no-overlap exclusion constraint
+
+Revision ID: 5b7e2c9d41a3
+Revises: c02f1d15f2ae
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c9d41a3'
+down_revision: Union[str, None] = 'c02f1d15f2ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # btree_gist provides the GiST "=" operator class for integer table_id
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.add_column('reservation', sa.Column(
+        'period',
+        postgresql.TSRANGE(),
+        sa.Computed(
+            "tsrange(reservation_time, "
+            "reservation_time + duration_minutes * interval '1 minute', '[]')",
+            persisted=True,
+        ),
+    ))
+    op.create_exclude_constraint(
+        'reservation_no_overlap',
+        'reservation',
+        ('table_id', '='),
+        ('period', '&&'),
+        using='gist',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('reservation_no_overlap', 'reservation', type_='exclude')
+    op.drop_column('reservation', 'period')
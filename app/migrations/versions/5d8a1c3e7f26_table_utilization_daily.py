@@ -0,0 +1,103 @@
+"""Daily table utilization aggregates
+
+Revision ID: 5d8a1c3e7f26
+Revises: 0b6e4d2f9a17
+Create Date: 2026-10-18 17:34:51.209664
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8a1c3e7f26'
+down_revision: Union[str, None] = '0b6e4d2f9a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Splits [start, end) of every changed reservation at midnight and adds each
+# part, times sign, to its day. Each (table, day) is upserted once and in key
+# order, so concurrent multi-row writes lock the aggregate rows in the same
+# order and cannot deadlock.
+UPSERT_CHANGES = """
+                INSERT INTO table_utilization_daily AS u (table_id, day, booked_seconds, reservations)
+                SELECT table_id, day, booked_seconds, reservations
+                FROM (
+                    SELECT
+                        c.table_id,
+                        day::date AS day,
+                        SUM(c.sign * EXTRACT(EPOCH FROM
+                            LEAST(c.end_time, day + interval '1 day') - GREATEST(c.reservation_time, day)
+                        ))::bigint AS booked_seconds,
+                        SUM(c.sign * (day = date_trunc('day', c.reservation_time))::integer) AS reservations
+                    FROM ({changes}) AS c
+                    CROSS JOIN LATERAL generate_series(
+                        date_trunc('day', c.reservation_time), c.end_time - interval '1 microsecond', interval '1 day'
+                    ) AS day
+                    GROUP BY c.table_id, day
+                ) AS delta
+                WHERE booked_seconds <> 0 OR reservations <> 0
+                ORDER BY table_id, day
+                ON CONFLICT (table_id, day) DO UPDATE SET
+                    booked_seconds = u.booked_seconds + EXCLUDED.booked_seconds,
+                    reservations = u.reservations + EXCLUDED.reservations"""
+NEW_ROWS = "SELECT table_id, reservation_time, end_time, 1 AS sign FROM new_rows"
+OLD_ROWS = "SELECT table_id, reservation_time, end_time, -1 AS sign FROM old_rows"
+TRIGGERS = [
+    ('INSERT', 'NEW TABLE AS new_rows', NEW_ROWS),
+    ('DELETE', 'OLD TABLE AS old_rows', OLD_ROWS),
+    ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows', f"{NEW_ROWS} UNION ALL {OLD_ROWS}"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('table_utilization_daily',
+    sa.Column('table_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('booked_seconds', sa.BigInteger(), nullable=False),
+    sa.Column('reservations', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['table_id'], ['table.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('table_id', 'day')
+    )
+    # Statement-level triggers, one per event: transition tables rule out
+    # column lists and several events per trigger. Updates that do not move
+    # a reservation add up to zero and are skipped.
+    for tg_op, referencing, changes in TRIGGERS:
+        op.execute(f"""
+            CREATE FUNCTION table_utilization_{tg_op.lower()}() RETURNS trigger AS $$
+            BEGIN
+                {UPSERT_CHANGES.format(changes=changes).strip()};
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"""
+            CREATE TRIGGER table_utilization_{tg_op.lower()}
+            AFTER {tg_op} ON reservation
+            REFERENCING {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION table_utilization_{tg_op.lower()}()
+        """)
+    op.execute("""
+        INSERT INTO table_utilization_daily (table_id, day, booked_seconds, reservations)
+        SELECT
+            r.table_id,
+            day::date,
+            SUM(EXTRACT(EPOCH FROM LEAST(r.end_time, day + interval '1 day') - GREATEST(r.reservation_time, day)))::bigint,
+            COUNT(*) FILTER (WHERE day = date_trunc('day', r.reservation_time))
+        FROM reservation r
+        CROSS JOIN LATERAL generate_series(
+            date_trunc('day', r.reservation_time), r.end_time - interval '1 microsecond', interval '1 day'
+        ) AS day
+        GROUP BY r.table_id, day
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tg_op, _, _ in TRIGGERS:
+        op.execute(f"DROP TRIGGER table_utilization_{tg_op.lower()} ON reservation")
+        op.execute(f"DROP FUNCTION table_utilization_{tg_op.lower()}()")
+    op.drop_table('table_utilization_daily')
@@ -0,0 +1,48 @@
+"""Reservation end_time column and table/time index
+
+Revision ID: 8d3f6a0e27b4
+Revises: 5b7e2c9d41a3
+Create Date: 2026-10-18 11:04:52.918305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3f6a0e27b4'
+down_revision: Union[str, None] = '5b7e2c9d41a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A stored generated column is backfilled by the table rewrite
+    # and kept up to date by Postgres on every insert and update.
+    op.add_column('reservation', sa.Column(
+        'end_time',
+        sa.DateTime(),
+        sa.Computed("reservation_time + duration_minutes * interval '1 minute'", persisted=True),
+    ))
+    op.create_index(
+        'ix_reservation_table_time',
+        'reservation',
+        ['table_id', 'reservation_time', 'end_time'],
+        unique=False,
+    )
+    # NOT VALID: enforced for new rows only, existing history is left as is.
+    # The conflict query relies on this bound to limit its index range scan.
+    op.execute(
+        "ALTER TABLE reservation ADD CONSTRAINT reservation_duration_range "
+        "CHECK (duration_minutes BETWEEN 1 AND 1440) NOT VALID"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('reservation_duration_range', 'reservation', type_='check')
+    op.drop_index('ix_reservation_table_time', table_name='reservation')
+    op.drop_column('reservation', 'end_time')
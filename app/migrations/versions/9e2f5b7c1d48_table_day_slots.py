@@ -0,0 +1,104 @@
+"""Per-table daily slot bitmaps
+
+Revision ID: 9e2f5b7c1d48
+Revises: 5d8a1c3e7f26
+Create Date: 2026-10-18 18:12:09.553018
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e2f5b7c1d48'
+down_revision: Union[str, None] = '5d8a1c3e7f26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('table_day_slots',
+    sa.Column('table_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('slots', postgresql.BIT(length=288), nullable=False),
+    sa.ForeignKeyConstraint(['table_id'], ['table.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('table_id', 'day')
+    )
+    # Slots of the day starting at p_day touched by [p_start, p_end], both
+    # ends inclusive, slot 0 first. Mirrors app.services.slots.window_masks.
+    op.execute("""
+        CREATE FUNCTION reservation_slot_mask(p_day timestamp, p_start timestamp, p_end timestamp)
+        RETURNS bit(288) AS $$
+            SELECT (repeat('0', first_slot) || repeat('1', last_slot - first_slot + 1) || repeat('0', 287 - last_slot))::bit(288)
+            FROM (SELECT
+                GREATEST(0, floor(EXTRACT(EPOCH FROM p_start - p_day) / 300))::integer AS first_slot,
+                LEAST(287, floor(EXTRACT(EPOCH FROM p_end - p_day) / 300))::integer AS last_slot
+            ) bounds
+        $$ LANGUAGE sql IMMUTABLE
+    """)
+    # Inserts OR their slots in. Slots may be shared by reservations that
+    # touch the same 5 minutes, so deletes recompute the affected days.
+    # The day row is locked before the recompute, which runs as a separate
+    # statement: its snapshot then includes every insert that ORed into the
+    # row before, and inserts after wait for the lock and OR into the result.
+    op.execute("""
+        CREATE FUNCTION table_day_slots_apply() RETURNS trigger AS $$
+        DECLARE
+            d timestamp;
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                FOR d IN SELECT generate_series(
+                    date_trunc('day', OLD.reservation_time), date_trunc('day', OLD.end_time), interval '1 day'
+                ) LOOP
+                    PERFORM 1 FROM table_day_slots
+                    WHERE table_id = OLD.table_id AND day = d::date
+                    FOR UPDATE;
+                    UPDATE table_day_slots SET slots = (
+                        SELECT COALESCE(bit_or(reservation_slot_mask(d, r.reservation_time, r.end_time)), 0::bit(288))
+                        FROM reservation r
+                        WHERE r.table_id = OLD.table_id
+                          AND r.reservation_time >= d - interval '1 day'
+                          AND r.reservation_time < d + interval '1 day'
+                          AND r.end_time >= d
+                    )
+                    WHERE table_id = OLD.table_id AND day = d::date;
+                END LOOP;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO table_day_slots AS s (table_id, day, slots)
+                SELECT NEW.table_id, d::date, reservation_slot_mask(d, NEW.reservation_time, NEW.end_time)
+                FROM generate_series(
+                    date_trunc('day', NEW.reservation_time), date_trunc('day', NEW.end_time), interval '1 day'
+                ) AS d
+                ON CONFLICT (table_id, day) DO UPDATE SET slots = s.slots | EXCLUDED.slots;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER table_day_slots_apply
+        AFTER INSERT OR DELETE OR UPDATE OF reservation_time, duration_minutes, table_id ON reservation
+        FOR EACH ROW EXECUTE FUNCTION table_day_slots_apply()
+    """)
+    op.execute("""
+        INSERT INTO table_day_slots (table_id, day, slots)
+        SELECT r.table_id, d::date, bit_or(reservation_slot_mask(d, r.reservation_time, r.end_time))
+        FROM reservation r
+        CROSS JOIN LATERAL generate_series(
+            date_trunc('day', r.reservation_time), date_trunc('day', r.end_time), interval '1 day'
+        ) AS d
+        GROUP BY r.table_id, d
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER table_day_slots_apply ON reservation")
+    op.execute("DROP FUNCTION table_day_slots_apply()")
+    op.execute("DROP FUNCTION reservation_slot_mask(timestamp, timestamp, timestamp)")
+    op.drop_table('table_day_slots')
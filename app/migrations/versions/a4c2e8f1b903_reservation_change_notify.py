@@ -0,0 +1,54 @@
+"""Notify reservation changes
+
+Revision ID: a4c2e8f1b903
+Revises: 1f9a4b6c8e25
+Create Date: 2026-10-18 13:40:18.207663
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c2e8f1b903'
+down_revision: Union[str, None] = '1f9a4b6c8e25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Notifications are delivered on commit, so writers pay no extra round trip.
+    op.execute("""
+        CREATE FUNCTION reservation_notify_change() RETURNS trigger AS $$
+        DECLARE
+            r reservation;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                r := OLD;
+            ELSE
+                r := NEW;
+            END IF;
+            PERFORM pg_notify('reservation_changed', json_build_object(
+                'op', TG_OP,
+                'table_id', r.table_id,
+                'start', to_char(r.reservation_time, 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+                'end', to_char(r.end_time, 'YYYY-MM-DD"T"HH24:MI:SS.US')
+            )::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER reservation_notify_change
+        AFTER INSERT OR DELETE ON reservation
+        FOR EACH ROW EXECUTE FUNCTION reservation_notify_change()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER reservation_notify_change ON reservation")
+    op.execute("DROP FUNCTION reservation_notify_change()")
@@ -0,0 +1,55 @@
+"""Table catalog version counter
+
+Revision ID: c7d1a3e5f048
+Revises: a4c2e8f1b903
+Create Date: 2026-10-18 15:02:44.781230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d1a3e5f048'
+down_revision: Union[str, None] = 'a4c2e8f1b903'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('catalog_version',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute("INSERT INTO catalog_version (name, version) VALUES ('table', 0)")
+    # Bumped in the writing transaction, so the version and the
+    # notification can never get ahead of the committed data.
+    op.execute("""
+        CREATE FUNCTION table_bump_catalog_version() RETURNS trigger AS $$
+        DECLARE
+            new_version bigint;
+        BEGIN
+            UPDATE catalog_version SET version = version + 1
+            WHERE name = 'table'
+            RETURNING version INTO new_version;
+            PERFORM pg_notify('table_changed', new_version::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER table_bump_catalog_version
+        AFTER INSERT OR UPDATE OR DELETE ON "table"
+        FOR EACH STATEMENT EXECUTE FUNCTION table_bump_catalog_version()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER table_bump_catalog_version ON "table"')
+    op.execute("DROP FUNCTION table_bump_catalog_version()")
+    op.drop_table('catalog_version')
@@ -0,0 +1,251 @@
+"""Monthly range partitions for reservation
+
+Revision ID: e3b9f7a2d614
+Revises: c7d1a3e5f048
+Create Date: 2026-10-18 16:10:27.402915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b9f7a2d614'
+down_revision: Union[str, None] = 'c7d1a3e5f048'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS_AHEAD_MONTHS = 3
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # reservation_duration_range was added NOT VALID, so legacy rows may
+    # break it. They cannot be carried over: the check is enforced on the
+    # partitioned table (NOT VALID is not allowed there) and both the
+    # cross-partition overlap trigger and the conflict query look back only
+    # 1440 minutes, so their overlaps would go undetected. Fail before
+    # touching anything and name the rows to fix or delete first.
+    op.execute("""
+        DO $$
+        DECLARE
+            offending bigint[];
+        BEGIN
+            SELECT array_agg(id ORDER BY id) INTO offending
+            FROM reservation
+            WHERE duration_minutes NOT BETWEEN 1 AND 1440;
+            IF offending IS NOT NULL THEN
+                RAISE EXCEPTION 'Cannot partition reservation: % row(s) have duration_minutes outside 1..1440',
+                    cardinality(offending)
+                USING DETAIL = 'Reservation ids: ' || array_to_string(offending[1:100], ', ')
+                    || CASE WHEN cardinality(offending) > 100 THEN ', ...' ELSE '' END,
+                    HINT = 'Shorten or delete these reservations and run the migration again.';
+            END IF;
+        END
+        $$
+    """)
+    # Free the names of the old table's indexes and constraints; the sequence
+    # is kept and handed over to the partitioned table.
+    op.execute("ALTER TABLE reservation RENAME TO reservation_unpartitioned")
+    op.execute("ALTER SEQUENCE reservation_id_seq OWNED BY NONE")
+    op.execute("DROP TRIGGER reservation_notify_change ON reservation_unpartitioned")
+    op.execute("DROP INDEX ix_reservation_id, ix_reservation_table_time, ix_reservation_time_id")
+    op.execute("""
+        ALTER TABLE reservation_unpartitioned
+        DROP CONSTRAINT reservation_no_overlap,
+        DROP CONSTRAINT reservation_pkey
+    """)
+
+    # The partition key has to be part of the primary key.
+    op.execute("""
+        CREATE TABLE reservation (
+            id integer NOT NULL DEFAULT nextval('reservation_id_seq'),
+            customer_name varchar NOT NULL,
+            reservation_time timestamp without time zone NOT NULL,
+            duration_minutes integer NOT NULL,
+            table_id integer NOT NULL REFERENCES "table" (id),
+            end_time timestamp without time zone GENERATED ALWAYS AS
+                (reservation_time + duration_minutes * interval '1 minute') STORED,
+            period tsrange GENERATED ALWAYS AS
+                (tsrange(reservation_time, reservation_time + duration_minutes * interval '1 minute', '[]')) STORED,
+            CONSTRAINT reservation_pkey PRIMARY KEY (id, reservation_time),
+            CONSTRAINT reservation_duration_range CHECK (duration_minutes BETWEEN 1 AND 1440)
+        ) PARTITION BY RANGE (reservation_time)
+    """)
+    op.execute("ALTER SEQUENCE reservation_id_seq OWNED BY reservation.id")
+    op.execute("CREATE INDEX ix_reservation_id ON reservation (id)")
+    op.execute("CREATE INDEX ix_reservation_table_time ON reservation (table_id, reservation_time, end_time)")
+    op.execute("CREATE INDEX ix_reservation_time_id ON reservation (reservation_time, id)")
+
+    # Exclusion constraints cannot be declared on a partitioned table, so
+    # every partition gets its own. Rows outside the monthly partitions
+    # land in the default one until their month is created.
+    op.execute("CREATE TABLE reservation_default PARTITION OF reservation DEFAULT")
+    op.execute("""
+        ALTER TABLE reservation_default ADD CONSTRAINT reservation_default_no_overlap
+        EXCLUDE USING gist (table_id WITH =, period WITH &&)
+    """)
+    op.execute("""
+        CREATE FUNCTION reservation_create_partition(for_month timestamp) RETURNS boolean AS $$
+        DECLARE
+            month_start timestamp := date_trunc('month', for_month);
+            month_end timestamp := date_trunc('month', for_month) + interval '1 month';
+            partition_name text := 'reservation_' || to_char(for_month, 'YYYY_MM');
+        BEGIN
+            IF to_regclass(partition_name) IS NOT NULL THEN
+                RETURN false;
+            END IF;
+            IF NOT EXISTS (
+                SELECT 1 FROM reservation_default
+                WHERE reservation_time >= month_start AND reservation_time < month_end
+            ) THEN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF reservation FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end);
+                EXECUTE format(
+                    'ALTER TABLE %I ADD CONSTRAINT %I EXCLUDE USING gist (table_id WITH =, period WITH &&)',
+                    partition_name, partition_name || '_no_overlap');
+                RETURN true;
+            END IF;
+            -- Rows parked in the default partition move to the new one. They
+            -- stay the same reservations, so they must not pass through
+            -- reservation or any of its partitions, where row and statement
+            -- triggers would log, broadcast and count them again. The default
+            -- is detached and split into two plain tables, which are attached
+            -- back; attaching fires no triggers. The default partition only
+            -- holds rows beyond the created months, so copying it is cheap.
+            ALTER TABLE reservation DETACH PARTITION reservation_default;
+            ALTER TABLE reservation_default RENAME TO reservation_default_old;
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE reservation INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS)',
+                partition_name);
+            CREATE TABLE reservation_default
+                (LIKE reservation INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS);
+            EXECUTE format(
+                'INSERT INTO %I (id, customer_name, reservation_time, duration_minutes, table_id) '
+                'SELECT id, customer_name, reservation_time, duration_minutes, table_id '
+                'FROM reservation_default_old WHERE reservation_time >= $1 AND reservation_time < $2',
+                partition_name) USING month_start, month_end;
+            INSERT INTO reservation_default (id, customer_name, reservation_time, duration_minutes, table_id)
+            SELECT id, customer_name, reservation_time, duration_minutes, table_id
+            FROM reservation_default_old
+            WHERE reservation_time < month_start OR reservation_time >= month_end;
+            DROP TABLE reservation_default_old;
+            EXECUTE format(
+                'ALTER TABLE %I ADD CONSTRAINT %I EXCLUDE USING gist (table_id WITH =, period WITH &&)',
+                partition_name, partition_name || '_no_overlap');
+            ALTER TABLE reservation_default ADD CONSTRAINT reservation_default_no_overlap
+                EXCLUDE USING gist (table_id WITH =, period WITH &&);
+            EXECUTE format(
+                'ALTER TABLE reservation ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_end);
+            ALTER TABLE reservation ATTACH PARTITION reservation_default DEFAULT;
+            RETURN true;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(f"""
+        SELECT reservation_create_partition(month)
+        FROM generate_series(
+            date_trunc('month', LEAST(
+                (SELECT min(reservation_time) FROM reservation_unpartitioned),
+                localtimestamp
+            )),
+            date_trunc('month', localtimestamp) + interval '{PARTITIONS_AHEAD_MONTHS} months',
+            interval '1 month'
+        ) AS month
+    """)
+    op.execute("""
+        INSERT INTO reservation (id, customer_name, reservation_time, duration_minutes, table_id)
+        SELECT id, customer_name, reservation_time, duration_minutes, table_id
+        FROM reservation_unpartitioned
+    """)
+    op.execute("DROP TABLE reservation_unpartitioned")
+
+    # Two reservations in neighbouring partitions can only overlap when both
+    # lie within a day of the month boundary. Those are serialized per table
+    # with an advisory lock and checked across partitions; the error matches
+    # the one raised by the exclusion constraints.
+    op.execute("""
+        CREATE FUNCTION reservation_check_overlap() RETURNS trigger AS $$
+        DECLARE
+            month_start timestamp := date_trunc('month', NEW.reservation_time);
+        BEGIN
+            IF NEW.reservation_time >= month_start + interval '1 day'
+               AND NEW.end_time < month_start + interval '1 month' THEN
+                RETURN NULL;
+            END IF;
+            PERFORM pg_advisory_xact_lock(hashtext('reservation_overlap'), NEW.table_id);
+            IF EXISTS (
+                SELECT 1 FROM reservation
+                WHERE table_id = NEW.table_id
+                  AND id <> NEW.id
+                  AND reservation_time >= NEW.reservation_time - interval '1 day'
+                  AND reservation_time <= NEW.end_time
+                  AND period && NEW.period
+            ) THEN
+                RAISE EXCEPTION 'conflicting key value violates exclusion constraint "reservation_no_overlap"'
+                USING ERRCODE = 'exclusion_violation', CONSTRAINT = 'reservation_no_overlap';
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER reservation_check_overlap
+        AFTER INSERT OR UPDATE OF reservation_time, duration_minutes, table_id ON reservation
+        FOR EACH ROW EXECUTE FUNCTION reservation_check_overlap()
+    """)
+    op.execute("""
+        CREATE TRIGGER reservation_notify_change
+        AFTER INSERT OR DELETE ON reservation
+        FOR EACH ROW EXECUTE FUNCTION reservation_notify_change()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE reservation RENAME TO reservation_partitioned")
+    op.execute("ALTER SEQUENCE reservation_id_seq OWNED BY NONE")
+    op.execute("DROP TRIGGER reservation_notify_change ON reservation_partitioned")
+    op.execute("DROP TRIGGER reservation_check_overlap ON reservation_partitioned")
+    op.execute("DROP FUNCTION reservation_check_overlap()")
+    op.execute("DROP FUNCTION reservation_create_partition(timestamp)")
+    op.execute("DROP INDEX ix_reservation_id, ix_reservation_table_time, ix_reservation_time_id")
+    op.execute("ALTER TABLE reservation_partitioned DROP CONSTRAINT reservation_pkey")
+
+    op.execute("""
+        CREATE TABLE reservation (
+            id integer NOT NULL DEFAULT nextval('reservation_id_seq'),
+            customer_name varchar NOT NULL,
+            reservation_time timestamp without time zone NOT NULL,
+            duration_minutes integer NOT NULL,
+            table_id integer NOT NULL REFERENCES "table" (id),
+            end_time timestamp without time zone GENERATED ALWAYS AS
+                (reservation_time + duration_minutes * interval '1 minute') STORED,
+            period tsrange GENERATED ALWAYS AS
+                (tsrange(reservation_time, reservation_time + duration_minutes * interval '1 minute', '[]')) STORED,
+            CONSTRAINT reservation_pkey PRIMARY KEY (id),
+            CONSTRAINT reservation_no_overlap EXCLUDE USING gist (table_id WITH =, period WITH &&)
+        )
+    """)
+    op.execute("ALTER SEQUENCE reservation_id_seq OWNED BY reservation.id")
+    op.execute("""
+        INSERT INTO reservation (id, customer_name, reservation_time, duration_minutes, table_id)
+        SELECT id, customer_name, reservation_time, duration_minutes, table_id
+        FROM reservation_partitioned
+    """)
+    op.execute("DROP TABLE reservation_partitioned")
+    op.execute("CREATE INDEX ix_reservation_id ON reservation (id)")
+    op.execute("CREATE INDEX ix_reservation_table_time ON reservation (table_id, reservation_time, end_time)")
+    op.execute("CREATE INDEX ix_reservation_time_id ON reservation (reservation_time, id)")
+    op.execute("""
+        ALTER TABLE reservation ADD CONSTRAINT reservation_duration_range
+        CHECK (duration_minutes BETWEEN 1 AND 1440) NOT VALID
+    """)
+    op.execute("""
+        CREATE TRIGGER reservation_notify_change
+        AFTER INSERT OR DELETE ON reservation
+        FOR EACH ROW EXECUTE FUNCTION reservation_notify_change()
+    """)
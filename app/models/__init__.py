@@ -1,7 +1,17 @@
+from .catalog_version import CatalogVersion
+from .change_event import ChangeEvent
+from .idempotency_key import IdempotencyKey
 from .reservation import Reservation
 from .table import Table
+from .table_day_slots import TableDaySlots
+from .table_utilization import TableUtilizationDaily
 
 __all__= (
+    "CatalogVersion",
+    "ChangeEvent",
+    "IdempotencyKey",
     "Reservation",
-    "Table"
+    "Table",
+    "TableDaySlots",
+    "TableUtilizationDaily",
 )
@@ -0,0 +1,9 @@
+from app.core.db import Base
+from sqlalchemy import BigInteger, Column, String
+
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_version"
+
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
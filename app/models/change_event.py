@@ -0,0 +1,18 @@
+from app.core.db import Base
+from sqlalchemy import BigInteger, Column, DateTime, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+class ChangeEvent(Base):
+    __tablename__ = "change_event"
+    # Written and broadcast on the change_event channel by triggers on
+    # "table" and reservation, see the 3c8f0a6d2e91 migration.
+
+    id = Column(BigInteger, primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+    entity = Column(String, nullable=False)
+    op = Column(String, nullable=False)
+    data = Column(JSONB, nullable=False)
+    # txid_current() of the writer and the xmin of its snapshot.
+    xid = Column(BigInteger, nullable=False, index=True)
+    xmin = Column(BigInteger, nullable=False)
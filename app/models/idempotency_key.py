@@ -0,0 +1,14 @@
+from app.core.db import Base
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String, func
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_key"
+
+    scope = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=False)
+    body = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,14 +1,41 @@
 from app.core.db import Base
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy import (
+    CheckConstraint, Column, Computed, DateTime, ForeignKey, Index, Integer, String,
+)
+from sqlalchemy.dialects.postgresql import TSRANGE
 from sqlalchemy.orm import relationship
 
 
 class Reservation(Base):
     __tablename__ = "reservation"
+    # Partitioned monthly by reservation_time. Exclusion constraints live on
+    # the partitions and a trigger checks overlaps across month boundaries,
+    # see the e3b9f7a2d614 migration.
+    __table_args__ = (
+        Index("ix_reservation_table_time", "table_id", "reservation_time", "end_time"),
+        Index("ix_reservation_time_id", "reservation_time", "id"),
+        CheckConstraint(
+            "duration_minutes BETWEEN 1 AND 1440",
+            name="reservation_duration_range",
+        ),
+        {"postgresql_partition_by": "RANGE (reservation_time)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     customer_name = Column(String, nullable=False)
-    reservation_time = Column(DateTime, nullable=False)
+    reservation_time = Column(DateTime, primary_key=True)
     duration_minutes = Column(Integer, nullable=False)
     table_id = Column(Integer, ForeignKey("table.id"), nullable=False)
-    table = relationship("Table", back_populates="reservations")
\ No newline at end of file
+    end_time = Column(
+        DateTime,
+        Computed("reservation_time + duration_minutes * interval '1 minute'", persisted=True),
+    )
+    period = Column(
+        TSRANGE,
+        Computed(
+            "tsrange(reservation_time, "
+            "reservation_time + duration_minutes * interval '1 minute', '[]')",
+            persisted=True,
+        ),
+    )
+    table = relationship("Table", back_populates="reservations")
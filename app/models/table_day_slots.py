@@ -0,0 +1,18 @@
+from app.core.db import Base
+from sqlalchemy import Column, Date, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import BIT
+
+from app.services.slots import SLOTS_PER_DAY
+
+
+class TableDaySlots(Base):
+    """
+    Busy 5-minute slots of a table on one day, slot 0 first, maintained
+    by a trigger on reservation. A slot is set when any reservation
+    touches it, so the bitmap can prove a window free but not busy.
+    """
+    __tablename__ = "table_day_slots"
+
+    table_id = Column(Integer, ForeignKey("table.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    slots = Column(BIT(SLOTS_PER_DAY), nullable=False)
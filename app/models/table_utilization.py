@@ -0,0 +1,16 @@
+from app.core.db import Base
+from sqlalchemy import BigInteger, Column, Date, ForeignKey, Integer
+
+
+class TableUtilizationDaily(Base):
+    """
+    Booked time per table and day, maintained by a trigger on reservation.
+    A reservation spanning midnight is split between the days it covers;
+    reservations counts the ones starting on that day.
+    """
+    __tablename__ = "table_utilization_daily"
+
+    table_id = Column(Integer, ForeignKey("table.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    booked_seconds = Column(BigInteger, nullable=False, default=0)
+    reservations = Column(Integer, nullable=False, default=0)
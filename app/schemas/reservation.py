@@ -1,13 +1,16 @@
+from enum import Enum
 from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
+MAX_DURATION_MINUTES = 24 * 60
+
 class ReservationBase(BaseModel):
     """
         This schema is base for a reservation.
     """
     customer_name: str = Field(min_length=1, max_length=100)
     reservation_time: datetime = Field(default_factory=datetime.now)
-    duration_minutes: int = Field(ge=1)
+    duration_minutes: int = Field(ge=1, le=MAX_DURATION_MINUTES)
     table_id: int
 
 class ReservationCreate(ReservationBase):
@@ -21,4 +24,25 @@ class Reservation(ReservationBase):
         This schema is used to return a reservation.
     """
     model_config = ConfigDict(from_attributes=True)
-    id: int
\ No newline at end of file
+    id: int
+
+class BulkMode(str, Enum):
+    atomic = "atomic"
+    partial = "partial"
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+
+class BulkItemStatus(str, Enum):
+    created = "created"
+    conflict = "conflict"
+    table_not_found = "table_not_found"
+    skipped = "skipped"
+
+class ReservationBulkResult(BaseModel):
+    """
+        This schema is used to return the outcome of one item of a bulk request.
+    """
+    index: int
+    status: BulkItemStatus
+    reservation: Reservation | None = None
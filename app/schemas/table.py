@@ -1,3 +1,5 @@
+from datetime import date, datetime
+from enum import Enum
 from pydantic import BaseModel, ConfigDict, Field
 
 class TableBase(BaseModel):
@@ -14,3 +16,27 @@ class TableDelete(BaseModel):
 class Table(TableBase):
     model_config = ConfigDict(from_attributes=True)
     id: int
+
+class Granularity(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+class TableUtilization(BaseModel):
+    table_id: int
+    location: str
+    period_start: date
+    booked_minutes: float
+    reservations: int
+    occupancy: float
+
+class TimeInterval(BaseModel):
+    start: datetime
+    end: datetime
+
+class TableDaySchedule(BaseModel):
+    table_id: int
+    date: date
+    slot_minutes: int
+    busy: list[TimeInterval]
+    free: list[TimeInterval]
@@ -0,0 +1,217 @@
+import asyncio
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+import json
+import logging
+from typing import AsyncIterator, Iterator
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import db
+from app.core.settings import settings
+from app.models import ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "change_event"
+CATCH_UP_BATCH_SIZE = 1000
+PRUNE_BATCH_SIZE = 10000
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """
+    Position of a client in the change feed, sent as the SSE event id.
+    Every event written by a transaction below xmin has been delivered;
+    id is the last event sent. Event ids are taken before commit and can
+    commit out of order, so they alone cannot tell what was missed.
+    """
+
+    xmin: int
+    id: int
+
+    @classmethod
+    def parse(cls, value: str | None) -> "Cursor | None":
+        try:
+            xmin, event_id = map(int, value.split(":"))
+        except (AttributeError, ValueError):
+            return None
+        return cls(xmin, event_id)
+
+    def __str__(self) -> str:
+        return f"{self.xmin}:{self.id}"
+
+
+def serialize_event(event: dict) -> str:
+    """Renders the data of a change event message; the cursor is added per client."""
+    data = {key: event[key] for key in ("id", "entity", "op", "data")}
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+
+def format_event(cursor: Cursor, entity: str, data: str) -> str:
+    """Renders a change event as a Server-Sent Events message."""
+    return f"id: {cursor}\nevent: {entity}\ndata: {data}\n\n"
+
+
+class ChangeFeed:
+    """
+    Fans change events received on the change_event channel out to every
+    subscriber of this worker. Each event is serialized once and queued for
+    all of them. A subscriber whose queue is full, or every subscriber after
+    the listener reconnects, gets a catch-up marker instead: events may have
+    been missed and have to be read back from the change_event log.
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self._subscribers: set[asyncio.Queue] = set()
+
+    @contextmanager
+    def subscribe(self) -> Iterator[asyncio.Queue]:
+        """
+        Yields a queue of (event, serialized data) pairs, or None when the
+        subscriber has to catch up from the log.
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def _publish(self, item: tuple[dict, str] | None) -> None:
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # The marker replaces the backlog: the log has all of it.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def handle_notification(self, payload: str) -> None:
+        event = json.loads(payload)
+        self._publish((event, serialize_event(event)))
+
+    def reset(self) -> None:
+        self._publish(None)
+
+
+async def event_exists(event_id: int, session: AsyncSession) -> bool:
+    query = select(ChangeEvent.id).where(ChangeEvent.id == event_id).exists()
+    return await session.scalar(select(query))
+
+
+async def get_events_since(
+    xmin: int,
+    after_id: int,
+    session: AsyncSession,
+    limit: int = CATCH_UP_BATCH_SIZE,
+) -> list[dict]:
+    """
+    Returns up to `limit` logged events of transactions from xmin on with
+    ids above after_id in id order.
+    """
+    query = select(
+        ChangeEvent.id, ChangeEvent.entity, ChangeEvent.op, ChangeEvent.data, ChangeEvent.xid, ChangeEvent.xmin
+    ).where(
+        ChangeEvent.xid >= xmin, ChangeEvent.id > after_id
+    ).order_by(ChangeEvent.id).limit(limit).execution_options(query_label="change_events_since")
+    return [row._asdict() for row in await session.execute(query)]
+
+
+async def get_watermark(session: AsyncSession) -> Cursor:
+    """Returns a cursor past every event committed so far."""
+    query = select(
+        func.txid_snapshot_xmin(func.txid_current_snapshot()), func.coalesce(func.max(ChangeEvent.id), 0)
+    ).execution_options(query_label="change_events_watermark")
+    xmin, event_id = (await session.execute(query)).one()
+    return Cursor(xmin, event_id)
+
+
+async def stream_events(last_event_id: str | None) -> AsyncIterator[str]:
+    """
+    Yields SSE messages for new change events. With a valid last_event_id
+    the logged events of transactions from its xmin on are sent first; if
+    its event was already pruned, a "reset" message tells the client to
+    reload its lists instead. Live events are queued from the subscription
+    on, so none fall between the catch-up and the live stream.
+
+    An event is delivered once per connection: events below the cursor's
+    xmin and those already sent are skipped. A resume may replay events
+    committed after the client's last one but written before it.
+    """
+    with change_feed.subscribe() as queue:
+        cursor = Cursor.parse(last_event_id)
+        # Events sent from transactions at or above cursor.xmin, by id.
+        sent: dict[int, int] = {cursor.id: cursor.xmin} if cursor else {}
+
+        def deliver(event: dict, data: str) -> str | None:
+            nonlocal cursor
+            if event["id"] in sent or (cursor and event["xid"] < cursor.xmin):
+                return None
+            xmin = max(cursor.xmin, event["xmin"]) if cursor else event["xmin"]
+            cursor = Cursor(xmin, event["id"])
+            sent[event["id"]] = event["xid"]
+            for event_id in [event_id for event_id, xid in sent.items() if xid < xmin]:
+                del sent[event_id]
+            return format_event(cursor, event["entity"], data)
+
+        async def catch_up() -> AsyncIterator[str]:
+            nonlocal cursor
+            async with db.async_sessionmaker() as session:
+                if cursor is None or cursor.id and not await event_exists(cursor.id, session):
+                    cursor = await get_watermark(session)
+                    sent.clear()
+                    yield f"id: {cursor}\nevent: reset\ndata: {{}}\n\n"
+                    return
+                xmin, after_id = cursor.xmin, 0
+                while events := await get_events_since(xmin, after_id, session):
+                    for event in events:
+                        if message := deliver(event, serialize_event(event)):
+                            yield message
+                    after_id = events[-1]["id"]
+
+        if last_event_id is not None:
+            async for message in catch_up():
+                yield message
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), settings.events_keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                async for message in catch_up():
+                    yield message
+                continue
+            if message := deliver(*item):
+                yield message
+
+
+async def prune_events(session: AsyncSession, retention_seconds: float) -> int:
+    """Deletes up to PRUNE_BATCH_SIZE events older than the retention and returns their number."""
+    expired = select(ChangeEvent.id).where(
+        ChangeEvent.created_at < func.now() - timedelta(seconds=retention_seconds)
+    ).order_by(ChangeEvent.id).limit(PRUNE_BATCH_SIZE)
+    query = delete(ChangeEvent).where(ChangeEvent.id.in_(expired)).execution_options(query_label="change_events_prune")
+    result = await session.execute(query)
+    return result.rowcount
+
+
+async def prune_periodically(interval_seconds: float, retention_seconds: float) -> None:
+    """Prunes the change event log every interval_seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            deleted = PRUNE_BATCH_SIZE
+            while deleted == PRUNE_BATCH_SIZE:
+                async with db.unit_of_work() as session:
+                    deleted = await prune_events(session, retention_seconds)
+        except Exception as e:
+            logger.error(f"Error pruning change events: {e}")
+
+
+change_feed = ChangeFeed(queue_size=settings.events_queue_size)
@@ -0,0 +1,99 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import timedelta
+import hashlib
+import logging
+
+from pydantic import BaseModel
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import unit_of_work
+from app.core.settings import settings
+from app.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+CLEANUP_BATCH_SIZE = 10000
+
+
+class IdempotencyKeyInUseError(Exception):
+    """
+    Raised when another request stored a response under the same key first.
+    """
+
+
+@dataclass(frozen=True)
+class IdempotencyRequest:
+    scope: str
+    key: str
+    request_hash: str
+
+
+def request_fingerprint(payload: BaseModel) -> str:
+    # Defaults are left out: a default_factory such as datetime.now would
+    # give every retry of the same request a different fingerprint.
+    return hashlib.sha256(payload.model_dump_json(exclude_unset=True).encode()).hexdigest()
+
+
+async def get_stored_response(request: IdempotencyRequest, session: AsyncSession) -> IdempotencyKey | None:
+    query = select(IdempotencyKey).where(
+        IdempotencyKey.scope == request.scope,
+        IdempotencyKey.key == request.key,
+        IdempotencyKey.expires_at > func.now(),
+    ).execution_options(query_label="idempotency_lookup")
+    return await session.scalar(query)
+
+
+async def save_response(
+    request: IdempotencyRequest,
+    response: BaseModel,
+    session: AsyncSession,
+    status_code: int = 200,
+) -> None:
+    """
+    Stores the response in the caller's transaction, so it is committed
+    together with the write it describes. An expired entry under the same
+    key is replaced. Raises IdempotencyKeyInUseError if a live entry exists.
+    """
+    values = {
+        "request_hash": request.request_hash,
+        "status_code": status_code,
+        "body": response.model_dump_json().encode(),
+        "created_at": func.now(),
+        "expires_at": func.now() + timedelta(seconds=settings.idempotency_key_ttl_seconds),
+    }
+    query = insert(IdempotencyKey).values(scope=request.scope, key=request.key, **values)
+    query = query.on_conflict_do_update(
+        index_elements=[IdempotencyKey.scope, IdempotencyKey.key],
+        set_=values,
+        where=IdempotencyKey.expires_at <= func.now(),
+    ).returning(IdempotencyKey.key).execution_options(query_label="idempotency_save")
+    if await session.scalar(query) is None:
+        raise IdempotencyKeyInUseError(f"Idempotency key {request.key} is already in use")
+
+
+async def delete_expired(session: AsyncSession) -> int:
+    """Deletes up to CLEANUP_BATCH_SIZE expired keys and returns their number."""
+    expired = select(IdempotencyKey.scope, IdempotencyKey.key).where(
+        IdempotencyKey.expires_at <= func.now()
+    ).limit(CLEANUP_BATCH_SIZE)
+    query = delete(IdempotencyKey).where(
+        tuple_(IdempotencyKey.scope, IdempotencyKey.key).in_(expired)
+    ).execution_options(query_label="idempotency_cleanup")
+    result = await session.execute(query)
+    return result.rowcount
+
+
+async def cleanup_periodically(interval_seconds: float) -> None:
+    """Deletes expired keys every interval_seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            deleted = CLEANUP_BATCH_SIZE
+            while deleted == CLEANUP_BATCH_SIZE:
+                async with unit_of_work() as session:
+                    deleted = await delete_expired(session)
+        except Exception as e:
+            logger.error(f"Error deleting expired idempotency keys: {e}")
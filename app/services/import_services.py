@@ -0,0 +1,229 @@
+import csv
+from dataclasses import dataclass, field
+from datetime import timedelta
+from enum import Enum
+from itertools import islice
+import json
+from typing import IO, Iterable, Iterator
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table as StagingTable, any_, bindparam, delete, insert, or_, select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable
+
+from app.models import Reservation, Table
+from app.schemas.reservation import ReservationCreate
+from app.schemas.table import TableCreate
+from app.services.intervals import sweep_conflicts
+from app.services.reservation_services import overlaps
+
+IMPORT_BATCH_SIZE = 5000
+
+# Temporary tables of the importing transaction, dropped when it commits.
+staging_metadata = MetaData()
+table_staging = StagingTable(
+    "table_import",
+    staging_metadata,
+    Column("line", Integer, primary_key=True, autoincrement=False),
+    Column("name", String),
+    Column("seats", Integer),
+    Column("location", String),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+reservation_staging = StagingTable(
+    "reservation_import",
+    staging_metadata,
+    Column("line", Integer, primary_key=True, autoincrement=False),
+    Column("customer_name", String),
+    Column("reservation_time", DateTime),
+    Column("duration_minutes", Integer),
+    Column("table_id", Integer),
+    Column("end_time", DateTime),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    rejected: dict[int, str] = field(default_factory=dict)
+
+
+def read_rows(file: IO[str], format: ImportFormat) -> Iterator[tuple[int, dict | None]]:
+    """
+    Yields (line number, row) from a CSV file with a header row or from
+    NDJSON. A line that is not a JSON object is yielded as None and fails
+    validation.
+    """
+    if format == ImportFormat.csv:
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line, content in enumerate(file, start=1):
+        if not content.strip():
+            continue
+        try:
+            yield line, json.loads(content)
+        except json.JSONDecodeError:
+            yield line, None
+
+
+def _batches(rows: Iterable, size: int) -> Iterator[list]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def _validate(batch: list[tuple[int, dict | None]], adapter: TypeAdapter, report: ImportReport) -> list[tuple[int, BaseModel]]:
+    """
+    Validates a batch in one call. Rows that fail are recorded in the
+    report and the rest of the batch is validated again without them.
+    """
+    lines = [line for line, _ in batch]
+    rows = [row for _, row in batch]
+    try:
+        return list(zip(lines, adapter.validate_python(rows)))
+    except ValidationError as e:
+        invalid = {}
+        for error in e.errors():
+            index, *loc = error["loc"]
+            invalid.setdefault(index, f"{'.'.join(map(str, loc)) or 'row'}: {error['msg']}")
+    for index, reason in invalid.items():
+        report.rejected[lines[index]] = reason
+    valid = [i for i in range(len(batch)) if i not in invalid]
+    return list(zip([lines[i] for i in valid], adapter.validate_python([rows[i] for i in valid])))
+
+
+async def _copy(session: AsyncSession, staging: StagingTable, records: list[tuple]) -> None:
+    if not records:
+        return
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        staging.name, records=records, columns=[column.name for column in staging.columns]
+    )
+
+
+async def _analyze(session: AsyncSession, staging: StagingTable) -> None:
+    # Temporary tables get no statistics from autovacuum.
+    await session.execute(text(f"ANALYZE {staging.name}"))
+
+
+async def import_tables(
+    rows: Iterable[tuple[int, dict | None]],
+    session: AsyncSession,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> ImportReport:
+    """
+    Validates rows as TableCreate in batches, copies the valid ones into a
+    staging table with COPY and inserts them with one INSERT ... SELECT in
+    file order. The caller commits.
+    """
+    report = ImportReport()
+    adapter = TypeAdapter(list[TableCreate])
+    await session.execute(CreateTable(table_staging))
+    for batch in _batches(rows, batch_size):
+        records = [
+            (line, table.name, table.seats, table.location)
+            for line, table in _validate(batch, adapter, report)
+        ]
+        await _copy(session, table_staging, records)
+    await _analyze(session, table_staging)
+
+    staged = table_staging.c
+    result = await session.execute(
+        insert(Table).from_select(
+            ["name", "seats", "location"],
+            select(staged.name, staged.seats, staged.location).order_by(staged.line),
+        ).execution_options(query_label="import_tables")
+    )
+    report.imported = result.rowcount
+    return report
+
+
+async def import_reservations(
+    rows: Iterable[tuple[int, dict | None]],
+    session: AsyncSession,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> ImportReport:
+    """
+    Validates rows as ReservationCreate in batches and copies the valid ones
+    into a staging table with COPY. Reservations on unknown tables or
+    overlapping stored ones are reported first; overlaps among the rest are
+    found with a sweep per table, the earliest reservation of each
+    overlapping group is kept. Everything else is inserted with one
+    INSERT ... SELECT.
+    Bookings are blocked from the check until the caller commits.
+    """
+    report = ImportReport()
+    adapter = TypeAdapter(list[ReservationCreate])
+    await session.execute(CreateTable(reservation_staging))
+    lines = []
+    intervals = []
+    for batch in _batches(rows, batch_size):
+        records = []
+        for line, reservation in _validate(batch, adapter, report):
+            start = reservation.reservation_time.replace(tzinfo=None)
+            end = start + timedelta(minutes=reservation.duration_minutes)
+            records.append((
+                line, reservation.customer_name, start, reservation.duration_minutes, reservation.table_id, end,
+            ))
+            lines.append(line)
+            intervals.append((reservation.table_id, start, end))
+        await _copy(session, reservation_staging, records)
+    await _analyze(session, reservation_staging)
+
+    staged = reservation_staging.c
+    # A booking or table deletion committed between the check and the insert
+    # would abort the whole import. Writers to reservation wait until the
+    # import commits (readers do not), and so do deletions of its tables.
+    await session.execute(text(f"LOCK TABLE {Reservation.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+    await session.execute(
+        select(Table.id).where(Table.id.in_(select(staged.table_id))).with_for_update(read=True, key_share=True)
+        .execution_options(query_label="import_reservations_lock_tables")
+    )
+
+    table_exists = select(Table.id).where(Table.id == staged.table_id).exists()
+    is_conflict = select(Reservation.id).where(
+        Reservation.table_id == staged.table_id,
+        overlaps(staged.reservation_time, staged.end_time),
+    ).exists()
+    rejected = select(staged.line, table_exists.label("table_exists")).where(
+        or_(~table_exists, is_conflict)
+    ).execution_options(query_label="import_reservations_check")
+    for row in await session.execute(rejected):
+        report.rejected[row.line] = "overlaps a stored reservation" if row.table_exists else "table not found"
+
+    # Only rows that passed the check compete with each other, so a row
+    # is not rejected because of one that will not be imported anyway.
+    candidates = [i for i, line in enumerate(lines) if line not in report.rejected]
+    in_file = [lines[candidates[i]] for i in sweep_conflicts([intervals[i] for i in candidates])]
+    for line in in_file:
+        report.rejected[line] = "overlaps another reservation in the file"
+    if in_file:
+        await session.execute(
+            delete(reservation_staging).where(staged.line == any_(bindparam("lines", in_file, type_=ARRAY(Integer))))
+        )
+
+    result = await session.execute(
+        insert(Reservation).from_select(
+            ["customer_name", "reservation_time", "duration_minutes", "table_id"],
+            select(staged.customer_name, staged.reservation_time, staged.duration_minutes, staged.table_id).where(
+                table_exists, ~is_conflict
+            ).order_by(staged.line),
+        ).execution_options(query_label="import_reservations")
+    )
+    report.imported = result.rowcount
+    return report
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Hashable, Sequence
+
+
+def sweep_conflicts(intervals: Sequence[tuple[Hashable, datetime, datetime]]) -> set[int]:
+    """
+    Finds intervals that overlap another interval with the same key.
+    Intervals are (key, start, end) with both ends inclusive. Per key they
+    are swept in start order; an interval that overlaps one already kept is
+    rejected, so the earliest of each overlapping group survives.
+    Returns the positions of the rejected intervals.
+    """
+    order = sorted(range(len(intervals)), key=lambda i: (intervals[i][0], intervals[i][1], i))
+    rejected = set()
+    last_key = None
+    last_end = None
+    for i in order:
+        key, start, end = intervals[i]
+        if key == last_key and start <= last_end:
+            rejected.add(i)
+            continue
+        last_key, last_end = key, end
+    return rejected
@@ -0,0 +1,92 @@
+from datetime import date, datetime
+import logging
+import re
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"^reservation_(\d{4})_(\d{2})$")
+# Serializes maintenance runs started by several workers at once.
+MAINTENANCE_LOCK_KEY = 0x72657376
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+async def get_partition_months(session: AsyncSession) -> dict[str, date]:
+    """Returns the attached monthly partitions of reservation by name."""
+    query = text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'reservation'::regclass
+    """)
+    partitions = {}
+    for name in (await session.scalars(query)).all():
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[name] = date(int(match[1]), int(match[2]), 1)
+    return partitions
+
+
+async def create_partitions(months_ahead: int, session: AsyncSession, today: date | None = None) -> list[str]:
+    """
+    Creates the partitions from the current month up to `months_ahead`
+    months ahead. Rows already parked in the default partition are moved.
+    Returns the names of the created partitions.
+    """
+    current = (today or date.today()).replace(day=1)
+    created = []
+    for i in range(months_ahead + 1):
+        month = add_months(current, i)
+        query = select(func.reservation_create_partition(datetime(month.year, month.month, 1)))
+        if await session.scalar(query):
+            created.append(f"reservation_{month:%Y_%m}")
+    return created
+
+
+async def detach_expired_partitions(
+    retention_months: int,
+    session: AsyncSession,
+    drop: bool = False,
+    today: date | None = None,
+) -> list[str]:
+    """
+    Detaches the partitions that ended more than `retention_months` months
+    before the current month. Detached partitions stay as plain tables for
+    archiving unless `drop` is set. Returns their names.
+    """
+    cutoff = add_months((today or date.today()).replace(day=1), -retention_months)
+    expired = sorted(
+        name for name, month in (await get_partition_months(session)).items()
+        if add_months(month, 1) <= cutoff
+    )
+    for name in expired:
+        await session.execute(text(f'ALTER TABLE reservation DETACH PARTITION "{name}"'))
+        if drop:
+            await session.execute(text(f'DROP TABLE "{name}"'))
+    return expired
+
+
+async def maintain_partitions(
+    months_ahead: int,
+    retention_months: int | None,
+    session: AsyncSession,
+    drop: bool = False,
+) -> tuple[list[str], list[str]]:
+    """
+    Creates upcoming partitions and, when a retention is set, detaches the
+    expired ones. Meant to run in one transaction: the advisory lock is
+    held until it ends. Returns (created, detached).
+    """
+    await session.execute(select(func.pg_advisory_xact_lock(MAINTENANCE_LOCK_KEY)))
+    created = await create_partitions(months_ahead, session)
+    detached = []
+    if retention_months is not None:
+        detached = await detach_expired_partitions(retention_months, session, drop=drop)
+    if created or detached:
+        logger.info(f"Reservation partitions created: {created}, detached: {detached}")
+    return created, detached
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+
+from app.core.db import unit_of_work
+from app.core.settings import settings
+from app.schemas.reservation import BulkItemStatus, Reservation, ReservationCreate
+from app.services import reservation_services as rs
+
+logger = logging.getLogger(__name__)
+
+
+class ReservationBatcher:
+    """
+    Group commit for single reservation creates. Requests arriving within
+    window_seconds of the first pending one are inserted together by
+    create_reservations in partial mode, in one transaction of its own:
+    conflicts are checked across the whole group and every caller gets the
+    result of its own item.
+    """
+
+    def __init__(self, window_seconds: float, max_batch: int) -> None:
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._pending: list[tuple[ReservationCreate, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def submit(self, reservation: ReservationCreate) -> Reservation:
+        """
+        Waits for the group containing the reservation to commit.
+        Raises ReservationConflictError or TableNotFoundError like
+        create_reservation.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((reservation, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._commit(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _commit(self, batch: list[tuple[ReservationCreate, asyncio.Future]]) -> None:
+        try:
+            async with unit_of_work() as session:
+                results = await rs.create_reservations(
+                    [reservation for reservation, _ in batch], False, session
+                )
+        except Exception as e:
+            logger.error(f"Error creating reservation group: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+            return
+
+        for (reservation, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if result.status == BulkItemStatus.created:
+                future.set_result(result.reservation)
+            elif result.status == BulkItemStatus.conflict:
+                future.set_exception(rs.ReservationConflictError(
+                    f"Table {reservation.table_id} is already reserved at this time"
+                ))
+            else:
+                future.set_exception(rs.TableNotFoundError(f"Table with id {reservation.table_id} not found"))
+
+    async def close(self) -> None:
+        """Commits the pending group and waits for running ones."""
+        self._flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+reservation_batcher = ReservationBatcher(
+    window_seconds=settings.group_commit_window_ms / 1000,
+    max_batch=settings.group_commit_max_batch,
+) if settings.group_commit_enabled else None
@@ -0,0 +1,183 @@
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import json
+import logging
+import time
+
+from sqlalchemy import and_, bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.listener import listener
+from app.core.settings import settings
+from app.models import Reservation, Table
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "reservation_changed"
+
+LOAD_SCHEDULE = select(Reservation.reservation_time, Reservation.end_time).where(
+    Reservation.table_id == bindparam("table_id"),
+    Reservation.end_time >= bindparam("window_start"),
+    Reservation.reservation_time <= bindparam("window_end"),
+).order_by(Reservation.reservation_time).execution_options(query_label="conflict_index_load")
+
+
+@dataclass
+class TableSchedule:
+    """
+    Reservations of one table inside [window_start, window_end].
+    Reservations on a table never overlap, so starts and ends
+    are sorted in the same order.
+    """
+    window_start: datetime
+    window_end: datetime
+    loaded_at: float
+    starts: list[datetime] = field(default_factory=list)
+    ends: list[datetime] = field(default_factory=list)
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        return self.window_start <= start and end <= self.window_end
+
+    def has_conflict(self, start: datetime, end: datetime) -> bool:
+        i = bisect_left(self.ends, start)
+        return i < len(self.starts) and self.starts[i] <= end
+
+    def add(self, start: datetime, end: datetime) -> None:
+        i = bisect_left(self.starts, start)
+        if i < len(self.starts) and self.starts[i] == start and self.ends[i] == end:
+            return
+        insort(self.starts, start)
+        insort(self.ends, end)
+
+    def remove(self, start: datetime, end: datetime) -> None:
+        i = bisect_left(self.starts, start)
+        if i < len(self.starts) and self.starts[i] == start and self.ends[i] == end:
+            del self.starts[i]
+            del self.ends[i]
+
+
+class ReservationIndex:
+    """
+    Per-worker cache of upcoming reservations per table, used to answer
+    conflict checks without a query. Schedules are loaded lazily for a
+    rolling horizon and kept current from local writes and from
+    reservation_changed notifications sent by the other workers.
+    Without a live listener connection the index is bypassed, and it is
+    cleared when the connection is re-established.
+    The exclusion constraint stays the final arbiter on insert.
+    """
+
+    def __init__(self, horizon: timedelta, ttl_seconds: float) -> None:
+        self.horizon = horizon
+        self.ttl_seconds = ttl_seconds
+        self._schedules: dict[int, TableSchedule] = {}
+        self._generations: dict[int, int] = {}
+        self._epoch = 0
+
+    def _get(self, table_id: int) -> TableSchedule | None:
+        schedule = self._schedules.get(table_id)
+        if schedule and time.monotonic() - schedule.loaded_at > self.ttl_seconds:
+            del self._schedules[table_id]
+            return None
+        return schedule
+
+    async def _load(self, table_id: int, session: AsyncSession) -> TableSchedule:
+        generation = (self._epoch, self._generations.get(table_id, 0))
+        window_start = datetime.now()
+        window_end = window_start + self.horizon
+        rows = (await session.execute(LOAD_SCHEDULE, {
+            "table_id": table_id, "window_start": window_start, "window_end": window_end,
+        })).all()
+        schedule = TableSchedule(
+            window_start=window_start,
+            window_end=window_end,
+            loaded_at=time.monotonic(),
+            starts=[row.reservation_time for row in rows],
+            ends=[row.end_time for row in rows],
+        )
+        # A change arrived while loading: the snapshot may be stale, use it once only.
+        if (self._epoch, self._generations.get(table_id, 0)) == generation:
+            self._schedules[table_id] = schedule
+        return schedule
+
+    async def prime(self, session: AsyncSession) -> None:
+        """Loads the schedules of all tables in one query."""
+        generations = (self._epoch, dict(self._generations))
+        window_start = datetime.now()
+        window_end = window_start + self.horizon
+        query = select(Table.id, Reservation.reservation_time, Reservation.end_time).outerjoin(
+            Reservation, and_(
+                Reservation.table_id == Table.id,
+                Reservation.end_time >= window_start,
+                Reservation.reservation_time <= window_end,
+            )
+        ).order_by(Table.id, Reservation.reservation_time).execution_options(query_label="conflict_index_prime")
+        schedules: dict[int, TableSchedule] = {}
+        for row in await session.execute(query):
+            schedule = schedules.setdefault(row.id, TableSchedule(
+                window_start=window_start, window_end=window_end, loaded_at=time.monotonic(),
+            ))
+            if row.reservation_time is not None:
+                schedule.starts.append(row.reservation_time)
+                schedule.ends.append(row.end_time)
+        epoch, loaded_generations = generations
+        for table_id, schedule in schedules.items():
+            if epoch == self._epoch and loaded_generations.get(table_id) == self._generations.get(table_id):
+                self._schedules[table_id] = schedule
+
+    async def has_conflict(
+        self,
+        table_id: int,
+        start: datetime,
+        duration_minutes: int,
+        session: AsyncSession
+    ) -> bool | None:
+        """
+        Returns True/False when the window falls inside the cached horizon,
+        or None when the answer has to come from the database.
+        """
+        if not listener.is_connected:
+            return None
+        start = start.replace(tzinfo=None)
+        end = start + timedelta(minutes=duration_minutes)
+        schedule = self._get(table_id)
+        if schedule is None:
+            if start < datetime.now():
+                return None
+            schedule = await self._load(table_id, session)
+        if not schedule.covers(start, end):
+            return None
+        return schedule.has_conflict(start, end)
+
+    def add(self, table_id: int, start: datetime, end: datetime) -> None:
+        self._generations[table_id] = self._generations.get(table_id, 0) + 1
+        schedule = self._schedules.get(table_id)
+        if schedule:
+            schedule.add(start, end)
+
+    def remove(self, table_id: int, start: datetime, end: datetime) -> None:
+        self._generations[table_id] = self._generations.get(table_id, 0) + 1
+        schedule = self._schedules.get(table_id)
+        if schedule:
+            schedule.remove(start, end)
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._schedules.clear()
+
+    def handle_notification(self, payload: str) -> None:
+        change = json.loads(payload)
+        table_id = change["table_id"]
+        start = datetime.fromisoformat(change["start"])
+        end = datetime.fromisoformat(change["end"])
+        if change["op"] == "DELETE":
+            self.remove(table_id, start, end)
+        else:
+            self.add(table_id, start, end)
+
+
+reservation_index = ReservationIndex(
+    horizon=timedelta(hours=settings.conflict_index_horizon_hours),
+    ttl_seconds=settings.conflict_index_ttl_seconds,
+) if settings.conflict_index_enabled else None
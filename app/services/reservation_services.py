@@ -1,66 +1,492 @@
+import asyncio
+from contextlib import nullcontext, suppress
 from datetime import datetime, timedelta
+from functools import lru_cache, partial
 import logging
-from sqlalchemy import select, delete
+from typing import AsyncIterator
+from sqlalchemy import (
+    DateTime, Integer, String, and_, bindparam, case, cast, column, delete, false, func, insert, or_,
+    select, tuple_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, BIT
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Reservation
-from app.schemas.reservation import ReservationCreate
+from app.core.db import on_commit
+from app.models import Reservation, Table, TableDaySlots
+from app.schemas.reservation import (
+    MAX_DURATION_MINUTES, BulkItemStatus, Reservation as ReservationSchema,
+    ReservationBulkResult, ReservationCreate,
+)
+from app.services import idempotency_services
+from app.services.idempotency_services import IdempotencyRequest
+from app.services.intervals import sweep_conflicts
+from app.services.reservation_index import reservation_index
+from app.services.slots import SLOTS_PER_DAY, bits_literal, mask_to_bits, window_masks
 
 logger = logging.getLogger(__name__)
 
-async def create_reservation(reservation: ReservationCreate, session: AsyncSession) -> Reservation | None:
-    reservation_db = Reservation(**reservation.model_dump())
+EXCLUSION_VIOLATION = "23P01"
+FOREIGN_KEY_VIOLATION = "23503"
+STREAM_BATCH_SIZE = 1000
+EXPORT_QUEUE_SIZE = 16
+
+RESERVATION_COLUMNS = [getattr(Reservation, name) for name in ReservationSchema.model_fields]
+
+
+
+def overlaps(start, end):
+    """
+    Builds a filter matching reservations that overlap [start, end].
+    Both ends are inclusive; start and end may be values or SQL expressions.
+    The lower bound on reservation_time relies on MAX_DURATION_MINUTES so
+    the (table_id, reservation_time, end_time) index only scans a bounded range.
+    """
+    return and_(
+        Reservation.reservation_time >= start - timedelta(minutes=MAX_DURATION_MINUTES),
+        Reservation.reservation_time <= end,
+        Reservation.end_time >= start,
+    )
+
+
+def _slots_hit(table_id, day_param: str, mask_param: str):
+    mask = cast(bindparam(mask_param, type_=String), BIT(SLOTS_PER_DAY))
+    return and_(
+        TableDaySlots.table_id == table_id,
+        TableDaySlots.day == bindparam(day_param),
+        TableDaySlots.slots.op("&")(mask) != bits_literal(0),
+    )
+
+
+def slots_conflict(table_id):
+    """
+    Builds an expression that is true when a reservation on table_id
+    overlaps the window bound by window_params. A window spans at most two
+    days (MAX_DURATION_MINUTES), so it is first ANDed with the table's slot
+    bitmaps of both days; the range query on reservation only runs when a
+    slot it touches is taken. table_id may be a value or a column.
+    """
+    slot_taken = select(TableDaySlots.day).where(
+        or_(_slots_hit(table_id, "first_day", "first_mask"), _slots_hit(table_id, "next_day", "next_mask"))
+    ).exists()
+    overlapping = select(Reservation.id).where(
+        Reservation.table_id == table_id,
+        overlaps(bindparam("start", type_=DateTime), bindparam("end", type_=DateTime)),
+    ).exists()
+    return case((~slot_taken, false()), else_=overlapping)
+
+
+def window_params(start: datetime, duration_minutes: int) -> dict:
+    """Returns the parameters of slots_conflict for [start, start + duration_minutes]."""
+    start = start.replace(tzinfo=None)
+    end = start + timedelta(minutes=duration_minutes)
+    first_day = start.date()
+    next_day = first_day + timedelta(days=1)
+    masks = window_masks(start, end)
+    return {
+        "start": start,
+        "end": end,
+        "first_day": first_day,
+        "first_mask": mask_to_bits(masks[first_day]),
+        "next_day": next_day,
+        "next_mask": mask_to_bits(masks.get(next_day, 0)),
+    }
+
+
+# Statements of the booking path are built once at import; executions only
+# bind their parameters, so SQLAlchemy's compiled cache is always hit.
+# The insert checks the slot bitmaps first and inserts nothing when the
+# window is taken, so most conflicts cost no failed insert; the exclusion
+# constraint still decides races.
+INSERT_RESERVATION = insert(Reservation).from_select(
+    ["customer_name", "reservation_time", "duration_minutes", "table_id"],
+    select(
+        bindparam("customer_name", type_=String),
+        bindparam("start", type_=DateTime),
+        bindparam("duration_minutes", type_=Integer),
+        bindparam("table_id", type_=Integer),
+    ).where(~slots_conflict(bindparam("table_id", type_=Integer))),
+).returning(Reservation).execution_options(query_label="create_reservation")
+# Items of a bulk request are passed as arrays, so the check has one shape
+# for every batch size.
+_batch = func.unnest(
+    bindparam("idx", type_=ARRAY(Integer)),
+    bindparam("table_ids", type_=ARRAY(Integer)),
+    bindparam("starts", type_=ARRAY(DateTime)),
+    bindparam("ends", type_=ARRAY(DateTime)),
+).table_valued(
+    column("idx", Integer), column("table_id", Integer), column("start", DateTime), column("end", DateTime),
+).render_derived(name="batch")
+BULK_CONFLICT_CHECK = select(
+    _batch.c.idx,
+    Table.id.is_(None).label("table_missing"),
+    select(Reservation.id).where(
+        Reservation.table_id == _batch.c.table_id,
+        overlaps(_batch.c.start, _batch.c.end),
+    ).exists().label("is_conflict"),
+).select_from(
+    _batch.outerjoin(Table, Table.id == _batch.c.table_id)
+).execution_options(query_label="bulk_conflict_check")
+# The API deletes by id alone, which is not the partition key, so this
+# probes ix_reservation_id in every partition; callers that know the
+# reservation_time should also filter on it to prune the rest.
+DELETE_RESERVATION = delete(Reservation).where(Reservation.id == bindparam("id")).returning(
+    Reservation.table_id, Reservation.reservation_time, Reservation.end_time
+).execution_options(query_label="delete_reservation")
+
+
+class ReservationConflictError(Exception):
+    """
+    Raised when a reservation overlaps an existing one on the same table.
+    """
+
+
+class TableNotFoundError(Exception):
+    """
+    Raised when a reservation references a table that does not exist.
+    """
+
+
+async def create_reservation(
+    reservation: ReservationCreate,
+    session: AsyncSession,
+    idempotency: IdempotencyRequest | None = None,
+) -> Reservation | None:
+    """
+    Inserts a reservation with a single INSERT ... SELECT ... RETURNING that
+    inserts nothing when the slot bitmaps and the reservations show an
+    overlap. Overlaps committed concurrently are rejected by the
+    reservation_no_overlap exclusion constraint and unknown tables by the
+    foreign key, so no pre-check queries are needed.
+    With idempotency the response is stored in the same transaction.
+    The caller commits; the conflict index is updated once it does.
+    Raises ReservationConflictError if the table is already reserved,
+    TableNotFoundError if the table does not exist and
+    IdempotencyKeyInUseError if the key was stored by another request.
+    """
+    if reservation_index is not None and await reservation_index.has_conflict(
+        reservation.table_id, reservation.reservation_time, reservation.duration_minutes, session
+    ):
+        raise ReservationConflictError(
+            f"Table {reservation.table_id} is already reserved at this time"
+        )
+    # With a key the router reads the stored response after a failure, so the
+    # insert runs in a savepoint that the failure rolls back on its own.
+    # Otherwise the error ends the request and unit_of_work rolls back.
+    savepoint = session.begin_nested() if idempotency is not None else nullcontext()
     try:
-        session.add(reservation_db)
-        await session.commit()
-        await session.refresh(reservation_db)
-        return reservation_db
-    except Exception as e:
+        async with savepoint:
+            reservation_db = await session.scalar(INSERT_RESERVATION, {
+                "customer_name": reservation.customer_name,
+                "duration_minutes": reservation.duration_minutes,
+                "table_id": reservation.table_id,
+                **window_params(reservation.reservation_time, reservation.duration_minutes),
+            })
+            if reservation_db is None:
+                raise ReservationConflictError(
+                    f"Table {reservation.table_id} is already reserved at this time"
+                )
+            if idempotency is not None:
+                await idempotency_services.save_response(
+                    idempotency, ReservationSchema.model_validate(reservation_db), session
+                )
+    except IntegrityError as e:
+        sqlstate = getattr(e.orig, "sqlstate", None)
+        if sqlstate == EXCLUSION_VIOLATION:
+            raise ReservationConflictError(
+                f"Table {reservation.table_id} is already reserved at this time"
+            ) from e
+        if sqlstate == FOREIGN_KEY_VIOLATION:
+            raise TableNotFoundError(f"Table with id {reservation.table_id} not found") from e
         logger.error(f"Error creating reservation: {e}")
-        await session.rollback()
         return None
+    if reservation_index is not None:
+        on_commit(session, partial(
+            reservation_index.add,
+            reservation_db.table_id, reservation_db.reservation_time, reservation_db.end_time,
+        ))
+    return reservation_db
 
-async def get_reservations(session: AsyncSession) -> list[Reservation]:
-    query = select(Reservation)
-    result = await session.execute(query)
-    return result.scalars().all()
+async def create_reservations(
+    reservations: list[ReservationCreate],
+    atomic: bool,
+    session: AsyncSession
+) -> list[ReservationBulkResult]:
+    """
+    Creates a batch of reservations with one check query and one INSERT.
+    Overlaps with stored reservations and unknown tables are found with a
+    single query, overlaps among the remaining items with a sweep per table.
+    In atomic mode nothing is inserted unless every item can be created.
+    Raises ReservationConflictError or TableNotFoundError if an atomic
+    insert loses a race with another writer.
+    """
+    rows = [
+        reservation.model_dump() | {
+            "reservation_time": reservation.reservation_time.replace(tzinfo=None)
+        }
+        for reservation in reservations
+    ]
+    statuses = [BulkItemStatus.created] * len(rows)
 
-async def get_reservation_by_id(id: int, session: AsyncSession) -> Reservation | None:
-    query = select(Reservation).where(Reservation.id == id)
-    result = await session.execute(query)
-    return result.scalar_one_or_none()
+    query_params = {
+        "idx": list(range(len(rows))),
+        "table_ids": [row["table_id"] for row in rows],
+        "starts": [row["reservation_time"] for row in rows],
+        "ends": [row["reservation_time"] + timedelta(minutes=row["duration_minutes"]) for row in rows],
+    }
+    for row in (await session.execute(BULK_CONFLICT_CHECK, query_params)).all():
+        if row.table_missing:
+            statuses[row.idx] = BulkItemStatus.table_not_found
+        elif row.is_conflict:
+            statuses[row.idx] = BulkItemStatus.conflict
 
-async def delete_reservation_by_id(id: int, session: AsyncSession) -> bool:
-    reservation = await get_reservation_by_id(id, session)
-    logger.warning(f"Reservation to delete: {reservation}")
-    if not reservation:
-        return False
+    # Only items that passed the check compete with each other, so an item
+    # is not rejected because of one that will not be created anyway.
+    candidates = [i for i, item_status in enumerate(statuses) if item_status == BulkItemStatus.created]
+    in_batch = sweep_conflicts([
+        (query_params["table_ids"][i], query_params["starts"][i], query_params["ends"][i]) for i in candidates
+    ])
+    for i in in_batch:
+        statuses[candidates[i]] = BulkItemStatus.conflict
 
-    query = delete(Reservation).where(Reservation.id == id)
-    await session.execute(query)
-    await session.commit()
-    return True
+    to_create = [i for i, item_status in enumerate(statuses) if item_status == BulkItemStatus.created]
+    if atomic and len(to_create) < len(rows):
+        return [
+            ReservationBulkResult(
+                index=i,
+                status=BulkItemStatus.skipped if item_status == BulkItemStatus.created else item_status,
+            )
+            for i, item_status in enumerate(statuses)
+        ]
+
+    created = {}
+    if to_create:
+        # In partial mode a lost race falls back to per-item inserts in the same
+        # transaction, so the multi-row INSERT gets a savepoint to roll back to.
+        savepoint = session.begin_nested() if not atomic else nullcontext()
+        try:
+            async with savepoint:
+                result = await session.scalars(
+                    insert(Reservation).values([rows[i] for i in to_create]).returning(Reservation).execution_options(
+                        query_label="bulk_create_reservations"
+                    )
+                )
+                # RETURNING does not keep the order of VALUES. Items left to create
+                # never overlap, so table and start identify each of them.
+                returned = {(row.table_id, row.reservation_time): row for row in result.all()}
+                created = {i: returned[rows[i]["table_id"], rows[i]["reservation_time"]] for i in to_create}
+        except IntegrityError as e:
+            sqlstate = getattr(e.orig, "sqlstate", None)
+            if atomic and sqlstate == EXCLUSION_VIOLATION:
+                raise ReservationConflictError("Batch overlaps a concurrent reservation") from e
+            if atomic and sqlstate == FOREIGN_KEY_VIOLATION:
+                raise TableNotFoundError("Batch references a table deleted concurrently") from e
+            if atomic:
+                raise
+            created = await _create_one_by_one(rows, to_create, statuses, session)
+
+    if reservation_index is not None:
+        for reservation_db in created.values():
+            on_commit(session, partial(
+                reservation_index.add,
+                reservation_db.table_id, reservation_db.reservation_time, reservation_db.end_time,
+            ))
+    return [
+        ReservationBulkResult(index=i, status=item_status, reservation=created.get(i))
+        for i, item_status in enumerate(statuses)
+    ]
 
 
-async def check_reservation_conflict(
-    new_reservation_time: datetime,
-    new_duration_minutes: int,
-    new_table_id: int,
+async def _create_one_by_one(
+    rows: list[dict],
+    to_create: list[int],
+    statuses: list[BulkItemStatus],
     session: AsyncSession
-) -> bool:
-    """
-    Checks if there is a conflict for a new reservation on a table.
-    Returns True if there is an overlap, else False.
-    """
-    new_reservation_time = new_reservation_time.replace(tzinfo=None)
-    query = select(Reservation).where(Reservation.table_id == new_table_id).filter(
-         new_reservation_time <= (
-            Reservation.reservation_time + (Reservation.duration_minutes * timedelta(minutes=1))
-        ),
-        Reservation.reservation_time <= (
-            new_reservation_time + timedelta(minutes=new_duration_minutes)
+) -> dict[int, Reservation]:
+    """
+    Fallback for partial mode when the multi-row INSERT raced with another
+    writer: inserts each item in its own savepoint. Integrity errors other
+    than an overlap or a deleted table are re-raised.
+    """
+    created = {}
+    for i in to_create:
+        try:
+            async with session.begin_nested():
+                created[i] = await session.scalar(
+                    insert(Reservation).values(rows[i]).returning(Reservation)
+                )
+        except IntegrityError as e:
+            sqlstate = getattr(e.orig, "sqlstate", None)
+            if sqlstate == EXCLUSION_VIOLATION:
+                statuses[i] = BulkItemStatus.conflict
+            elif sqlstate == FOREIGN_KEY_VIOLATION:
+                statuses[i] = BulkItemStatus.table_not_found
+            else:
+                raise
+    return created
+
+
+def _reservations_params(
+    table_id: int | None = None,
+    time_from: datetime | None = None,
+    time_to: datetime | None = None,
+    location: str | None = None,
+    after: tuple[datetime, int] | None = None,
+    limit: int | None = None,
+) -> dict:
+    """Returns the parameters of the filters that are set."""
+    params = {
+        "table_id": table_id,
+        "time_from": time_from.replace(tzinfo=None) if time_from is not None else None,
+        "time_to": time_to.replace(tzinfo=None) if time_to is not None else None,
+        "location": location,
+        "after_time": after[0] if after is not None else None,
+        "after_id": after[1] if after is not None else None,
+        "limit": limit,
+    }
+    return {name: value for name, value in params.items() if value is not None}
+
+
+@lru_cache(maxsize=None)
+def _reservations_statement(filters: frozenset[str], label: str, columns: bool = False):
+    """
+    Builds the listing statement for a set of filters with bound parameters.
+    Each combination is built once, so listing requests only bind values.
+    """
+    query = select(*RESERVATION_COLUMNS) if columns else select(Reservation)
+    if "table_id" in filters:
+        query = query.where(Reservation.table_id == bindparam("table_id"))
+    if "time_from" in filters:
+        query = query.where(Reservation.reservation_time >= bindparam("time_from", type_=DateTime))
+    if "time_to" in filters:
+        query = query.where(Reservation.reservation_time < bindparam("time_to", type_=DateTime))
+    if "location" in filters:
+        query = query.join(Table, Table.id == Reservation.table_id).where(Table.location == bindparam("location"))
+    if "after_time" in filters:
+        after_time = bindparam("after_time", type_=DateTime)
+        # The plain bound lets the planner prune partitions before the cursor.
+        query = query.where(
+            Reservation.reservation_time >= after_time,
+            tuple_(Reservation.reservation_time, Reservation.id) > tuple_(after_time, bindparam("after_id", type_=Integer)),
         )
+    query = query.order_by(Reservation.reservation_time, Reservation.id)
+    if "limit" in filters:
+        query = query.limit(bindparam("limit", type_=Integer))
+    return query.execution_options(query_label=label)
+
+
+async def get_reservations(
+    session: AsyncSession,
+    *,
+    table_id: int | None = None,
+    time_from: datetime | None = None,
+    time_to: datetime | None = None,
+    location: str | None = None,
+    after: tuple[datetime, int] | None = None,
+    limit: int | None = None,
+) -> list[Reservation]:
+    """
+    Returns reservations ordered by (reservation_time, id).
+    after is a keyset cursor: only rows strictly after it are returned.
+    """
+    params = _reservations_params(table_id, time_from, time_to, location, after, limit)
+    result = await session.execute(_reservations_statement(frozenset(params), "list_reservations"), params)
+    return result.scalars().all()
+
+
+async def get_reservation_rows(
+    session: AsyncSession,
+    *,
+    table_id: int | None = None,
+    time_from: datetime | None = None,
+    time_to: datetime | None = None,
+    location: str | None = None,
+    after: tuple[datetime, int] | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """
+    Same as get_reservations, but returns plain dicts in the field order of
+    the Reservation schema without building ORM objects.
+    """
+    params = _reservations_params(table_id, time_from, time_to, location, after, limit)
+    query = _reservations_statement(frozenset(params), "list_reservations", columns=True)
+    result = await session.execute(query, params)
+    return [row._asdict() for row in result]
+
+
+async def stream_reservations(
+    session: AsyncSession,
+    *,
+    table_id: int | None = None,
+    time_from: datetime | None = None,
+    time_to: datetime | None = None,
+    location: str | None = None,
+) -> AsyncIterator[Reservation]:
+    """
+    Yields reservations through a server-side cursor, so only one
+    batch of rows is held in memory at a time.
+    """
+    params = _reservations_params(table_id, time_from, time_to, location)
+    result = await session.stream_scalars(
+        _reservations_statement(frozenset(params), "stream_reservations"),
+        params,
+        execution_options={"yield_per": STREAM_BATCH_SIZE},
     )
-    conflicting_reservations = await session.execute(query)
-    conflicting_reservations = conflicting_reservations.scalars().all()
-    return len(conflicting_reservations) > 0
\ No newline at end of file
+    async for reservation in result:
+        yield reservation
+
+async def copy_reservations_csv(
+    session: AsyncSession,
+    *,
+    time_from: datetime | None = None,
+    time_to: datetime | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Yields reservations ordered by time as CSV with a header row, produced
+    by COPY ... TO STDOUT on the session's asyncpg connection. Chunks are
+    passed on as Postgres sends them; at most EXPORT_QUEUE_SIZE wait for
+    the consumer, so a slow client slows the COPY down. A COPY that is
+    interrupted invalidates the connection instead of returning it to the pool.
+    """
+    params = _reservations_params(time_from=time_from, time_to=time_to)
+    query = _reservations_statement(frozenset(params), "export_reservations", columns=True)
+    connection = await session.connection()
+    compiled = query.compile(dialect=connection.dialect)
+    bound = compiled.construct_params(params)
+    args = [bound[name] for name in compiled.positiontup]
+    raw_connection = await connection.get_raw_connection()
+
+    chunks: asyncio.Queue[bytes | None] = asyncio.Queue()
+    free_slots = asyncio.Semaphore(EXPORT_QUEUE_SIZE)
+
+    async def output(chunk: bytes) -> None:
+        await free_slots.acquire()
+        chunks.put_nowait(chunk)
+
+    copying = asyncio.create_task(raw_connection.driver_connection.copy_from_query(
+        str(compiled), *args, output=output, format="csv", header=True
+    ))
+    copying.add_done_callback(lambda _: chunks.put_nowait(None))
+    try:
+        while (chunk := await chunks.get()) is not None:
+            free_slots.release()
+            yield chunk
+        await copying
+    finally:
+        if not copying.done():
+            copying.cancel()
+            with suppress(asyncio.CancelledError):
+                await copying
+            await connection.invalidate()
+
+async def delete_reservation_by_id(id: int, session: AsyncSession) -> bool:
+    deleted = (await session.execute(DELETE_RESERVATION, {"id": id})).first()
+    if deleted is None:
+        return False
+
+    if reservation_index is not None:
+        on_commit(session, partial(
+            reservation_index.remove, deleted.table_id, deleted.reservation_time, deleted.end_time
+        ))
+    return True
+
@@ -0,0 +1,58 @@
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import cast, literal
+from sqlalchemy.dialects.postgresql import BIT
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+SLOT = timedelta(minutes=SLOT_MINUTES)
+
+
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, time())
+
+
+def window_masks(start: datetime, end: datetime) -> dict[date, int]:
+    """
+    Returns, per day, the mask of the slots touched by [start, end], both
+    ends inclusive, with bit i standing for slot i. Two windows overlap
+    only if their masks share a bit on some day.
+    """
+    masks = {}
+    day = start.date()
+    while day <= end.date():
+        offset = day_start(day)
+        first = max(0, (start - offset) // SLOT)
+        last = min(SLOTS_PER_DAY - 1, (end - offset) // SLOT)
+        masks[day] = ((1 << (last - first + 1)) - 1) << first
+        day += timedelta(days=1)
+    return masks
+
+
+def mask_to_bits(mask: int) -> str:
+    """Renders a mask as a Postgres bit string, slot 0 first."""
+    return format(mask, f"0{SLOTS_PER_DAY}b")[::-1]
+
+
+def bits_literal(mask: int):
+    """A mask as a bit(SLOTS_PER_DAY) SQL value."""
+    return cast(literal(mask_to_bits(mask)), BIT(SLOTS_PER_DAY))
+
+
+def bits_to_mask(bits: str) -> int:
+    return int(bits[::-1], 2)
+
+
+def slot_runs(mask: int, day: date, busy: bool) -> list[tuple[datetime, datetime]]:
+    """Merges consecutive busy (or free) slots of a day into intervals."""
+    offset = day_start(day)
+    runs = []
+    run_start = None
+    for i in range(SLOTS_PER_DAY + 1):
+        matches = i < SLOTS_PER_DAY and bool(mask >> i & 1) == busy
+        if matches and run_start is None:
+            run_start = i
+        elif not matches and run_start is not None:
+            runs.append((offset + run_start * SLOT, offset + i * SLOT))
+            run_start = None
+    return runs
@@ -1,45 +1,173 @@
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 import logging
-from sqlalchemy import select, delete
+from sqlalchemy import DateTime, Integer, String, and_, bindparam, cast, delete, func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Table
-from app.schemas.table import TableCreate
+from app.models import Table, TableDaySlots, TableUtilizationDaily
+from app.schemas.table import Granularity, Table as TableSchema, TableCreate
+from app.services import idempotency_services
+from app.services.idempotency_services import IdempotencyRequest
+from app.services.reservation_services import slots_conflict, window_params
+from app.services.slots import SLOT_MINUTES, bits_to_mask, slot_runs
 
 
 logger = logging.getLogger(__name__)
 
-async def create_table(table: TableCreate, session: AsyncSession) -> Table | None:
-    table_db = Table(**table.model_dump())
-    try:
-        session.add(table_db)
-        await session.commit()
-        await session.refresh(table_db)
-        return table_db
-    except Exception as e:
-        logger.error(f"Error creating table: {e}")
-        await session.rollback()
-        return None
+TABLE_COLUMNS = [getattr(Table, name) for name in TableSchema.model_fields]
+
+INSERT_TABLE = insert(Table).returning(Table).execution_options(query_label="create_table")
+DELETE_TABLE = delete(Table).where(Table.id == bindparam("id")).returning(Table.id).execution_options(
+    query_label="delete_table"
+)
+
+async def create_table(
+    table: TableCreate,
+    session: AsyncSession,
+    idempotency: IdempotencyRequest | None = None,
+) -> Table | None:
+    """
+    Inserts a table. With idempotency the response is stored in the same
+    transaction; raises IdempotencyKeyInUseError if the key was stored
+    by another request. Database errors are left to the caller's
+    unit of work, which rolls back.
+    """
+    if idempotency is None:
+        return await session.scalar(INSERT_TABLE, table.model_dump())
+    # The router reads the stored response when the key is taken, so the
+    # insert is rolled back to a savepoint instead of ending the transaction.
+    async with session.begin_nested():
+        table_db = await session.scalar(INSERT_TABLE, table.model_dump())
+        await idempotency_services.save_response(idempotency, TableSchema.model_validate(table_db), session)
+    return table_db
 
 async def get_tables(session: AsyncSession) -> list[Table]:
-    query = select(Table)
+    query = select(Table).execution_options(query_label="list_tables")
     result = await session.execute(query)
     return result.scalars().all()
 
-async def get_table_by_id(id: int, session: AsyncSession) -> Table | None:
-    query = select(Table).where(Table.id == id)
+async def get_table_rows(session: AsyncSession) -> list[dict]:
+    """
+    Returns tables as plain dicts in the field order of the Table schema,
+    without building ORM objects, for serializing straight to JSON.
+    """
+    query = select(*TABLE_COLUMNS).execution_options(query_label="list_tables")
     result = await session.execute(query)
-    return result.scalar_one_or_none()
+    return [row._asdict() for row in result]
+
+@lru_cache(maxsize=None)
+def _available_tables_statement(by_location: bool):
+    query = select(Table).where(Table.seats >= bindparam("seats", type_=Integer), ~slots_conflict(Table.id))
+    if by_location:
+        query = query.where(Table.location == bindparam("location", type_=String))
+    return query.order_by(Table.seats, Table.id).execution_options(query_label="available_tables")
+
+async def get_available_tables(
+    start: datetime,
+    duration_minutes: int,
+    seats: int,
+    location: str | None,
+    session: AsyncSession
+) -> list[Table]:
+    """
+    Returns tables with at least `seats` seats that have no reservation
+    overlapping the requested window, smallest fitting tables first.
+    Tables whose slot bitmaps are free in the window are not looked up
+    in reservation at all.
+    """
+    params = window_params(start, duration_minutes) | {"seats": seats}
+    if location is not None:
+        params["location"] = location
+    result = await session.execute(_available_tables_statement(location is not None), params)
+    return result.scalars().all()
+
+def _period_end(start: date, granularity: Granularity) -> date:
+    if granularity == Granularity.day:
+        return start + timedelta(days=1)
+    if granularity == Granularity.week:
+        return start + timedelta(days=7)
+    return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+async def get_utilization(
+    date_from: date,
+    date_to: date,
+    granularity: Granularity,
+    location: str | None,
+    session: AsyncSession
+) -> list[dict]:
+    """
+    Returns booked time per table and period for the days from date_from
+    to date_to inclusive, summed from the daily aggregates. occupancy is
+    the booked share of the period's hours that fall inside the range.
+    """
+    daily = TableUtilizationDaily
+    period = func.date_trunc(granularity.value, cast(daily.day, DateTime)).label("period_start")
+    query = select(
+        Table.id.label("table_id"),
+        Table.location,
+        period,
+        func.sum(daily.booked_seconds).label("booked_seconds"),
+        func.sum(daily.reservations).label("reservations"),
+    ).join(Table, Table.id == daily.table_id).where(
+        daily.day >= date_from,
+        daily.day <= date_to,
+    )
+    if location is not None:
+        query = query.where(Table.location == location)
+    query = query.group_by(Table.id, Table.location, period).order_by(period, Table.id).execution_options(
+        query_label="table_utilization"
+    )
+    rows = []
+    for row in await session.execute(query):
+        start = row.period_start.date()
+        days = (min(_period_end(start, granularity), date_to + timedelta(days=1)) - max(start, date_from)).days
+        rows.append({
+            "table_id": row.table_id,
+            "location": row.location,
+            "period_start": start,
+            "booked_minutes": row.booked_seconds / 60,
+            "reservations": row.reservations,
+            "occupancy": row.booked_seconds / (days * 24 * 60 * 60),
+        })
+    return rows
+
+def _day_schedule(table_id: int, day: date, bits: str | None) -> dict:
+    mask = bits_to_mask(bits) if bits is not None else 0
+    return {
+        "table_id": table_id,
+        "date": day,
+        "slot_minutes": SLOT_MINUTES,
+        "busy": [{"start": start, "end": end} for start, end in slot_runs(mask, day, busy=True)],
+        "free": [{"start": start, "end": end} for start, end in slot_runs(mask, day, busy=False)],
+    }
+
+def _schedule_query(day: date):
+    return select(Table.id, cast(TableDaySlots.slots, String).label("slots")).outerjoin(
+        TableDaySlots, and_(TableDaySlots.table_id == Table.id, TableDaySlots.day == day)
+    )
+
+async def get_table_schedule(table_id: int, day: date, session: AsyncSession) -> dict | None:
+    """
+    Returns the busy and free intervals of a table on a day, merged from its
+    slot bitmap. Busy intervals are rounded out to whole slots. None if the
+    table does not exist.
+    """
+    query = _schedule_query(day).where(Table.id == table_id).execution_options(query_label="table_schedule")
+    row = (await session.execute(query)).one_or_none()
+    if row is None:
+        return None
+    return _day_schedule(row.id, day, row.slots)
+
+async def get_floor_schedule(day: date, location: str | None, session: AsyncSession) -> list[dict]:
+    """Returns the schedules of all tables on a day in one query."""
+    query = _schedule_query(day)
+    if location is not None:
+        query = query.where(Table.location == location)
+    query = query.order_by(Table.id).execution_options(query_label="floor_schedule")
+    return [_day_schedule(row.id, day, row.slots) for row in await session.execute(query)]
 
 async def delete_table_by_id(id: int, session: AsyncSession) -> bool:
-    table = await get_table_by_id(id, session)
-    if not table:
+    deleted_id = await session.scalar(DELETE_TABLE, {"id": id})
+    if deleted_id is None:
         return False
-
-    query = delete(Table).where(Table.id == id)
-    await session.execute(query)
-    await session.commit()
     return True
-
-async def is_table_exists(id: int, session: AsyncSession) -> bool:
-    table = await get_table_by_id(id, session)
-    return table is not None
\ No newline at end of file
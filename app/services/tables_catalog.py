@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+import logging
+
+from pydantic_core import to_json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.listener import listener
+from app.models import CatalogVersion
+from app.services import table_services
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "table_changed"
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    etag: str
+    body: bytes
+    is_empty: bool
+
+
+class TablesCatalog:
+    """
+    Per-worker cache of the serialized GET /api/tables/ response.
+    The catalog version is bumped by a trigger on every write to "table"
+    and broadcast on the table_changed channel, so every worker drops its
+    copy as soon as the writing transaction commits. Writes made by this
+    worker also invalidate it directly. Without a live listener connection
+    the cache is bypassed.
+    """
+
+    def __init__(self) -> None:
+        self._snapshot: CatalogSnapshot | None = None
+        self._latest_version = -1
+        self._generation = 0
+
+    async def _load(self, session: AsyncSession) -> CatalogSnapshot:
+        query = select(CatalogVersion.version).where(CatalogVersion.name == "table").execution_options(
+            query_label="catalog_version"
+        )
+        version = await session.scalar(query) or 0
+        rows = await table_services.get_table_rows(session)
+        return CatalogSnapshot(
+            version=version,
+            etag=f'"tables-{version}"',
+            body=to_json(rows),
+            is_empty=not rows,
+        )
+
+    async def get(self, session: AsyncSession) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if listener.is_connected and snapshot and snapshot.version >= self._latest_version:
+            return snapshot
+
+        generation = self._generation
+        snapshot = await self._load(session)
+        if listener.is_connected and generation == self._generation:
+            self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._snapshot = None
+
+    def handle_notification(self, payload: str) -> None:
+        self._latest_version = max(self._latest_version, int(payload))
+        self.invalidate()
+
+
+tables_catalog = TablesCatalog()
@@ -0,0 +1,125 @@
+import asyncio
+from datetime import datetime
+import logging
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core import db
+from app.core.listener import listener
+from app.core.settings import settings
+from app.services import reservation_index, reservation_services, table_services, tables_catalog
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY_SECONDS = 1.0
+# Far in the past: the reads find nothing and do not depend on the data.
+WARMUP_TIME = datetime(2000, 1, 1)
+# Writes of the request path with the columns they are executed with.
+# They are only prepared, so warm-up writes nothing, fires no triggers and
+# takes no locks.
+WRITE_STATEMENTS = [
+    (reservation_services.INSERT_RESERVATION, None),
+    (reservation_services.DELETE_RESERVATION, None),
+    (table_services.INSERT_TABLE, ["name", "seats", "location"]),
+    (table_services.DELETE_TABLE, None),
+]
+
+ready = asyncio.Event()
+
+
+async def _prepare_writes(session: AsyncSession) -> None:
+    """
+    PREPAREs the write statements on the session's connection, so the
+    backend has loaded the catalog entries they touch before the first
+    request writes.
+    """
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    for statement, column_keys in WRITE_STATEMENTS:
+        compiled = statement.compile(dialect=connection.dialect, column_keys=column_keys)
+        await raw_connection.driver_connection.prepare(str(compiled))
+
+
+async def _prepare_reads(session: AsyncSession) -> None:
+    if settings.json_fast_path:
+        await table_services.get_table_rows(session)
+        await reservation_services.get_reservation_rows(session, limit=1)
+    else:
+        await table_services.get_tables(session)
+        await reservation_services.get_reservations(session, limit=1)
+    await table_services.get_available_tables(WARMUP_TIME, 60, 1, None, session)
+    await table_services.get_floor_schedule(WARMUP_TIME.date(), None, session)
+
+
+async def _prepare_primary(session: AsyncSession) -> None:
+    # Reads fall back to the primary when there is no replica or it lags.
+    await _prepare_reads(session)
+    await _prepare_writes(session)
+
+
+async def fill_pool(
+    factory: sessionmaker,
+    connections: int,
+    prepare: Callable[[AsyncSession], Awaitable[None]],
+) -> None:
+    """
+    Opens `connections` sessions that hold their connections at the same
+    time, so each one is a separate pool connection, and runs prepare in
+    each of them. Their transactions are rolled back.
+    """
+    checked_out = 0
+    all_checked_out = asyncio.Event()
+
+    async def warm() -> None:
+        nonlocal checked_out
+        async with factory() as session:
+            await session.connection()
+            checked_out += 1
+            if checked_out == connections:
+                all_checked_out.set()
+            await all_checked_out.wait()
+            await prepare(session)
+            await session.rollback()
+
+    await asyncio.gather(*(warm() for _ in range(connections)))
+
+
+async def _prime_caches() -> None:
+    index = reservation_index.reservation_index
+    if not settings.tables_cache_enabled and index is None:
+        return
+    # Both caches are kept only while notifications are received.
+    await listener.wait_connected()
+    async with db.async_sessionmaker() as session:
+        if settings.tables_cache_enabled:
+            await tables_catalog.tables_catalog.get(session)
+        if index is not None:
+            await index.prime(session)
+
+
+async def warm_up() -> None:
+    """
+    Opens up to db_pool_size connections on the primary (and on the replica,
+    if configured), runs the hot reads and prepares the writes on each of
+    them, and loads the in-process caches. Nothing is written.
+    """
+    connections = min(settings.warmup_connections or settings.db_pool_size, settings.db_pool_size)
+    await fill_pool(db.async_sessionmaker, connections, _prepare_primary)
+    if db.read_sessionmaker is not None:
+        await fill_pool(db.read_sessionmaker, connections, _prepare_reads)
+    await _prime_caches()
+
+
+async def warm_up_until_ready() -> None:
+    """Retries the warm-up until it succeeds, then marks the worker ready."""
+    while True:
+        try:
+            await asyncio.wait_for(warm_up(), settings.warmup_timeout_seconds)
+            break
+        except Exception as e:
+            logger.error(f"Warm-up failed: {e!r}")
+        await asyncio.sleep(RETRY_DELAY_SECONDS)
+    ready.set()
+    logger.info("Warm-up finished")
@@ -0,0 +1,279 @@
+"""
+Load benchmark for the reservation hot paths.
+
+Seeds a local Postgres with tables and reservations, then drives the
+running service with concurrent async clients and reports throughput and
+latency percentiles per scenario. Results are written as JSON so that
+runs can be compared:
+
+    python -m benchmarks.load seed --tables 200 --reservations 50000 --reset
+    python -m benchmarks.load run --base-url http://localhost:8000 --output benchmarks/results/run.json
+    python -m benchmarks.load compare benchmarks/results/base.json benchmarks/results/run.json
+
+Database settings are taken from the same environment variables as the app.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import count
+from pathlib import Path
+
+import httpx
+from sqlalchemy import func, insert, select, text
+
+from app.core.db import engine, unit_of_work
+from app.models import Reservation, Table
+from app.services import partition_services
+
+SEED_START = datetime(2030, 1, 1, 10, 0)
+SLOT = timedelta(hours=2)
+DURATION_MINUTES = 60
+SEED_BATCH_SIZE = 5000
+# Fresh reservations are placed after every stored one, including those
+# created by earlier runs, so they never conflict.
+FRESH_START = datetime(2040, 1, 1, 10, 0)
+
+
+async def create_partitions(start: datetime, end: datetime) -> None:
+    """
+    Creates the monthly partitions from start to end, so benchmark rows do
+    not pile up in the default partition and skew the measured plans.
+    """
+    months = (end.year - start.year) * 12 + end.month - start.month
+    async with unit_of_work() as session:
+        created = await partition_services.create_partitions(months, session, today=start.date())
+    if created:
+        print(f"Created partitions {', '.join(created)}")
+
+
+async def seed(tables: int, reservations: int, reset: bool) -> None:
+    await create_partitions(SEED_START, SEED_START + max(reservations - 1, 0) // max(tables, 1) * SLOT)
+    async with engine.begin() as conn:
+        if reset:
+            await conn.execute(text('TRUNCATE reservation, "table" RESTART IDENTITY CASCADE'))
+        table_ids = (await conn.execute(
+            insert(Table).returning(Table.id),
+            [
+                {"name": f"Bench table {i}", "seats": 2 + i % 6, "location": f"Hall {i % 4}"}
+                for i in range(tables)
+            ],
+        )).scalars().all()
+
+        rows = []
+        for i in range(reservations):
+            rows.append({
+                "customer_name": f"Bench guest {i}",
+                "reservation_time": SEED_START + (i // tables) * SLOT,
+                "duration_minutes": DURATION_MINUTES,
+                "table_id": table_ids[i % tables],
+            })
+            if len(rows) == SEED_BATCH_SIZE:
+                await conn.execute(insert(Reservation), rows)
+                rows = []
+        if rows:
+            await conn.execute(insert(Reservation), rows)
+    await engine.dispose()
+    print(f"Seeded {tables} tables and {reservations} reservations")
+
+
+async def load_targets() -> tuple[list[int], list[tuple[int, datetime]], datetime]:
+    """Returns the table ids, a sample of stored reservations and the start of free time."""
+    async with engine.connect() as conn:
+        table_ids = (await conn.execute(select(Table.id))).scalars().all()
+        sample = (await conn.execute(
+            select(Reservation.table_id, Reservation.reservation_time)
+            .order_by(func.random())
+            .limit(10000)
+        )).all()
+        last_end = await conn.scalar(select(func.max(Reservation.end_time)))
+    await engine.dispose()
+    fresh_start = FRESH_START
+    if last_end is not None and last_end >= FRESH_START:
+        fresh_start += ((last_end - FRESH_START) // SLOT + 1) * SLOT
+    return table_ids, [(row.table_id, row.reservation_time) for row in sample], fresh_start
+
+
+def build_scenarios(table_ids: list[int], existing: list[tuple[int, datetime]], fresh_start: datetime) -> dict:
+    fresh = count()
+
+    def create_free():
+        slot = next(fresh)
+        return "POST", "/api/reservations/", {
+            "customer_name": "Bench guest",
+            "reservation_time": (fresh_start + slot * SLOT).isoformat(),
+            "duration_minutes": DURATION_MINUTES,
+            "table_id": random.choice(table_ids),
+        }
+
+    def create_conflicting():
+        table_id, reservation_time = random.choice(existing)
+        return "POST", "/api/reservations/", {
+            "customer_name": "Bench guest",
+            "reservation_time": (reservation_time + timedelta(minutes=15)).isoformat(),
+            "duration_minutes": DURATION_MINUTES,
+            "table_id": table_id,
+        }
+
+    def list_tables():
+        return "GET", "/api/tables/", None
+
+    def list_reservations():
+        return "GET", "/api/reservations/", None
+
+    scenarios = {
+        "create_reservation": (create_free, {200}),
+        "list_tables": (list_tables, {200}),
+        "list_reservations": (list_reservations, {200}),
+    }
+    if existing:
+        scenarios["create_reservation_conflict"] = (create_conflicting, {409})
+    return scenarios
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    make_request,
+    expected: set[int],
+    requests: int,
+    concurrency: int,
+) -> dict:
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            method, url, body = make_request()
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                ok = response.status_code in expected
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    # quantiles() needs two samples; a single one is every percentile.
+    if len(latencies) > 1:
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    else:
+        percentiles = latencies * 99
+    return {
+        "requests": requests,
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "throughput_rps": requests / elapsed,
+        "p50_ms": percentiles[49] * 1000,
+        "p95_ms": percentiles[94] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+async def run(base_url: str, requests: int, concurrency: int, only: list[str] | None, output: Path | None) -> dict:
+    table_ids, existing, fresh_start = await load_targets()
+    if not table_ids:
+        sys.exit("No tables found, run the seed command first")
+    # create_free books one new slot per request.
+    await create_partitions(fresh_start, fresh_start + requests * SLOT)
+    await engine.dispose()
+    scenarios = build_scenarios(table_ids, existing, fresh_start)
+
+    results = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        for name, (make_request, expected) in scenarios.items():
+            if only and name not in only:
+                continue
+            results[name] = await run_scenario(client, make_request, expected, requests, concurrency)
+            print_result(name, results[name])
+
+    report = {
+        "started_at": datetime.now().isoformat(),
+        "base_url": base_url,
+        "concurrency": concurrency,
+        "requests_per_scenario": requests,
+        "python": platform.python_version(),
+        "scenarios": results,
+    }
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        print(f"Results written to {output}")
+    return report
+
+
+def print_result(name: str, result: dict) -> None:
+    print(
+        f"{name:30} {result['throughput_rps']:9.1f} req/s  "
+        f"p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms  "
+        f"p99 {result['p99_ms']:7.2f} ms  errors {result['errors']}"
+    )
+
+
+def compare(baseline_path: Path, current_path: Path, tolerance: float) -> bool:
+    """
+    Prints the change of every metric and returns False when throughput
+    dropped or p95/p99 grew by more than `tolerance` (a fraction).
+    """
+    baseline = json.loads(baseline_path.read_text())["scenarios"]
+    current = json.loads(current_path.read_text())["scenarios"]
+    ok = True
+    for name in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[name], current[name]
+        for metric, higher_is_better in (("throughput_rps", True), ("p95_ms", False), ("p99_ms", False)):
+            change = (after[metric] - before[metric]) / before[metric]
+            regressed = -change > tolerance if higher_is_better else change > tolerance
+            ok = ok and not regressed
+            print(
+                f"{name:30} {metric:15} {before[metric]:10.2f} -> {after[metric]:10.2f} "
+                f"({change:+.1%}){'  REGRESSION' if regressed else ''}"
+            )
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="insert benchmark tables and reservations")
+    seed_parser.add_argument("--tables", type=int, default=100)
+    seed_parser.add_argument("--reservations", type=int, default=10000)
+    seed_parser.add_argument("--reset", action="store_true", help="truncate tables and reservations first")
+
+    run_parser = commands.add_parser("run", help="drive the running service")
+    run_parser.add_argument("--base-url", default="http://localhost:8000")
+    run_parser.add_argument("--requests", type=int, default=2000, help="requests per scenario, at least 1")
+    run_parser.add_argument("--concurrency", type=int, default=32)
+    run_parser.add_argument("--scenario", action="append", help="run only the named scenario")
+    run_parser.add_argument("--output", type=Path)
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--tolerance", type=float, default=0.1)
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        asyncio.run(seed(args.tables, args.reservations, args.reset))
+    elif args.command == "run":
+        if args.requests < 1:
+            parser.error("--requests must be at least 1")
+        asyncio.run(run(args.base_url, args.requests, args.concurrency, args.scenario, args.output))
+    elif not compare(args.baseline, args.current, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+#!/bin/bash
+# Allows streaming replication connections to the primary, see docker-compose.replica.yml.
+set -e
+echo "host replication all all md5" >> "$PGDATA/pg_hba.conf"
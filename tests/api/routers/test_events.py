@@ -0,0 +1,14 @@
+import pytest
+from fastapi import status
+
+from app.core.settings import settings
+
+
+@pytest.mark.asyncio
+async def test_get_events_disabled(monkeypatch, client):
+    monkeypatch.setattr(settings, "events_enabled", False)
+
+    response = client.get("/api/events")
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json() == {"detail": "Change feed is disabled"}
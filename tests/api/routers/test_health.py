@@ -0,0 +1,80 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import status
+
+from prometheus_client import CollectorRegistry, Histogram
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import db
+from app.core.metrics import histogram_snapshot
+from app.services import warmup
+
+
+@pytest.mark.asyncio
+async def test_get_pool_status(client):
+    response = client.get("/api/health/pool")
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert {"pid", "primary"} <= body.keys()
+    primary = body["primary"]
+    assert {"size", "checked_out", "overflow", "queue_wait_seconds"} <= primary.keys()
+    assert primary["queue_wait_seconds"]["buckets"]["+Inf"] == primary["queue_wait_seconds"]["count"]
+
+
+@pytest.mark.asyncio
+async def test_pool_status_reports_replica_lag(monkeypatch):
+    replica = create_async_engine("postgresql+asyncpg://replica/db")
+    monitor = AsyncMock()
+    monitor.lag.return_value = float("inf")
+    monkeypatch.setattr(db, "read_engine", replica)
+    monkeypatch.setattr(db, "replica_lag", monitor)
+
+    status = await db.pool_status()
+
+    assert status["replica"]["lag_seconds"] is None
+    assert status["replica"]["serving_reads"] is False
+    assert status["replica"]["checked_out"] == 0
+
+
+def test_histogram_snapshot():
+    histogram = Histogram("test_seconds", "Test", buckets=(0.1, 1.0), registry=CollectorRegistry())
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram_snapshot(histogram) == {
+        "count": 4,
+        "sum": 3.65,
+        "buckets": {"0.1": 2, "1.0": 3, "+Inf": 4},
+    }
+
+
+def test_histogram_snapshot_filters_by_labels():
+    histogram = Histogram("test_seconds", "Test", ["engine"], buckets=(1.0,), registry=CollectorRegistry())
+    histogram.labels("primary").observe(0.5)
+    histogram.labels("replica").observe(2.0)
+
+    assert histogram_snapshot(histogram, engine="replica") == {
+        "count": 1,
+        "sum": 2.0,
+        "buckets": {"1.0": 0, "+Inf": 1},
+    }
+
+
+@pytest.mark.asyncio
+async def test_ready_after_startup(client):
+    response = client.get("/api/health/ready")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"status": "ready"}
+
+
+@pytest.mark.asyncio
+async def test_not_ready(monkeypatch, client):
+    monkeypatch.setattr(warmup, "ready", asyncio.Event())
+
+    response = client.get("/api/health/ready")
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
@@ -1,11 +1,17 @@
+import base64
+import gzip
 import pytest
 from fastapi.testclient import TestClient
 
 from datetime import datetime
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock
 from app.main import app
-from app.schemas.reservation import Reservation, ReservationCreate
-from app.services import reservation_services, table_services
+from app.schemas.reservation import (
+    BulkItemStatus, Reservation, ReservationBulkResult, ReservationCreate,
+)
+from app.core.settings import settings
+from app.models import IdempotencyKey
+from app.services import idempotency_services, reservation_services
 from fastapi import status
 
 client = TestClient(app)
@@ -50,16 +56,90 @@ async def test_get_reservations_not_found(monkeypatch, client):
     mock_get_reservations.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_get_reservations_next_cursor(monkeypatch, client):
+    second = reservation.model_copy(update={"id": 2})
+    mock_get_reservations = AsyncMock(return_value=[reservation, second])
+    monkeypatch.setattr(reservation_services, "get_reservations", mock_get_reservations)
+
+    response = client.get("/api/reservations/", params={"limit": 1, "table_id": 1})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [reservation.model_dump(mode="json")]
+    assert "X-Next-Cursor" in response.headers
+    kwargs = mock_get_reservations.call_args.kwargs
+    assert kwargs["limit"] == 2
+    assert kwargs["table_id"] == 1
+
+    response = client.get(
+        "/api/reservations/",
+        params={"limit": 1, "cursor": response.headers["X-Next-Cursor"]},
+    )
+
+    assert mock_get_reservations.call_args.kwargs["after"] == (
+        reservation.reservation_time, reservation.id
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_invalid_cursor(client):
+    response = client.get("/api/reservations/", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_cursor_with_offset(client):
+    cursor = base64.urlsafe_b64encode(b"2025-04-12T12:00:00+03:00|1").decode()
+
+    response = client.get("/api/reservations/", params={"cursor": cursor})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_stream(monkeypatch, client):
+    async def mock_stream_reservations(session, **filters):
+        yield reservation
+
+    monkeypatch.setattr(reservation_services, "stream_reservations", mock_stream_reservations)
+
+    response = client.get("/api/reservations/", params={"stream": True})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text == reservation.model_dump_json() + "\n"
+
+
+@pytest.mark.asyncio
+async def test_export_reservations_gzip(monkeypatch, client):
+    async def mock_copy_reservations_csv(session, **filters):
+        assert filters == {"time_from": datetime(2025, 4, 1), "time_to": None}
+        yield b"id,customer_name\n"
+        yield b"1,John Doe\n"
+
+    monkeypatch.setattr(reservation_services, "copy_reservations_csv", mock_copy_reservations_csv)
+
+    response = client.get("/api/reservations/export", params={"from": "2025-04-01T00:00:00", "gzip": True})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-disposition"] == 'attachment; filename="reservations.csv.gz"'
+    assert gzip.decompress(response.content) == b"id,customer_name\n1,John Doe\n"
+
+
+@pytest.mark.asyncio
+async def test_export_reservations_invalid_range(client):
+    response = client.get("/api/reservations/export", params={"from": "2025-04-02T00:00:00", "to": "2025-04-01T00:00:00"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 @pytest.mark.asyncio
 async def test_create_reservation_success(monkeypatch, mock_session, client):
-    mock_get_table = AsyncMock(return_value=MagicMock(id=1))
-    mock_check_conflict = AsyncMock(return_value=False)
     mock_create_reservation = AsyncMock(return_value=reservation)
 
-    monkeypatch.setattr(table_services, "get_table_by_id", mock_get_table)
-    monkeypatch.setattr(
-        reservation_services, "check_reservation_conflict", mock_check_conflict
-    )
     monkeypatch.setattr(
         reservation_services, "create_reservation", mock_create_reservation
     )
@@ -74,52 +154,47 @@ async def test_create_reservation_success(monkeypatch, mock_session, client):
         "duration_minutes": 60,
         "table_id": 1,
     }
-    mock_get_table.assert_called_once()
-    mock_check_conflict.assert_called_once()
     mock_create_reservation.assert_called_once()
 
 
 @pytest.mark.asyncio
 async def test_create_reservation_table_not_found(monkeypatch, client):
-    mock_get_table = AsyncMock(return_value=None)
-    monkeypatch.setattr(table_services, "get_table_by_id", mock_get_table)
+    mock_create_reservation = AsyncMock(
+        side_effect=reservation_services.TableNotFoundError()
+    )
+    monkeypatch.setattr(
+        reservation_services, "create_reservation", mock_create_reservation
+    )
 
     response = client.post("/api/reservations/", json=reservation_create_json)
 
     assert response.status_code == status.HTTP_400_BAD_REQUEST
     assert response.json() == {"detail": "Table with id 1 not found"}
-    mock_get_table.assert_called_once()
+    mock_create_reservation.assert_called_once()
 
 
 @pytest.mark.asyncio
 async def test_create_reservation_time_conflict(monkeypatch, mock_session, client):
-    mock_get_table = AsyncMock(return_value=MagicMock(id=1))
-    mock_check_conflict = AsyncMock(return_value=True)
-    monkeypatch.setattr(table_services, "get_table_by_id", mock_get_table)
+    mock_create_reservation = AsyncMock(
+        side_effect=reservation_services.ReservationConflictError()
+    )
     monkeypatch.setattr(
-        reservation_services, "check_reservation_conflict", mock_check_conflict
+        reservation_services, "create_reservation", mock_create_reservation
     )
 
     response = client.post("/api/reservations/", json=reservation_create_json)
 
-    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.status_code == status.HTTP_409_CONFLICT
     assert response.json() == {
         "detail": "Time conflicts. This table is already reserved at this time"
     }
-    mock_get_table.assert_called_once()
-    mock_check_conflict.assert_called_once()
+    mock_create_reservation.assert_called_once()
 
 
 @pytest.mark.asyncio
 async def test_create_reservation_failed(monkeypatch, client):
-    mock_get_table = AsyncMock(return_value=MagicMock(id=1))
-    mock_check_conflict = AsyncMock(return_value=False)
     mock_create_reservation = AsyncMock(return_value=None)
 
-    monkeypatch.setattr(table_services, "get_table_by_id", mock_get_table)
-    monkeypatch.setattr(
-        reservation_services, "check_reservation_conflict", mock_check_conflict
-    )
     monkeypatch.setattr(
         reservation_services, "create_reservation", mock_create_reservation
     )
@@ -128,15 +203,68 @@ async def test_create_reservation_failed(monkeypatch, client):
 
     assert response.status_code == status.HTTP_400_BAD_REQUEST
     assert response.json() == {"detail": "Reservation not created"}
-    mock_get_table.assert_called_once()
-    mock_check_conflict.assert_called_once()
     mock_create_reservation.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_create_reservation_idempotent_replay(monkeypatch, client):
+    stored = IdempotencyKey(
+        request_hash=idempotency_services.request_fingerprint(ReservationCreate(**reservation_create_json)),
+        status_code=200,
+        body=reservation.model_dump_json().encode(),
+    )
+    monkeypatch.setattr(idempotency_services, "get_stored_response", AsyncMock(return_value=stored))
+    mock_create_reservation = AsyncMock()
+    monkeypatch.setattr(reservation_services, "create_reservation", mock_create_reservation)
+
+    response = client.post(
+        "/api/reservations/", json=reservation_create_json, headers={"Idempotency-Key": "retry-1"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["idempotent-replayed"] == "true"
+    assert response.json() == reservation.model_dump(mode="json")
+    mock_create_reservation.assert_not_called()
+
+
+def test_request_fingerprint_ignores_defaults():
+    payload = {"customer_name": "John Doe", "duration_minutes": 60, "table_id": 1}
+
+    first = idempotency_services.request_fingerprint(ReservationCreate(**payload))
+    retry = idempotency_services.request_fingerprint(ReservationCreate(**payload))
+
+    assert first == retry
+
+
+@pytest.mark.asyncio
+async def test_create_reservation_idempotency_key_reused(monkeypatch, client):
+    stored = IdempotencyKey(request_hash="other", status_code=200, body=b"{}")
+    monkeypatch.setattr(idempotency_services, "get_stored_response", AsyncMock(return_value=stored))
+
+    response = client.post(
+        "/api/reservations/", json=reservation_create_json, headers={"Idempotency-Key": "retry-1"}
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json() == {"detail": "Idempotency-Key was already used with a different request"}
+
+
 @pytest.mark.asyncio
 async def test_create_reservation_invalid_data(client):
-    invalid_data = reservation_create_json
-    invalid_data["reservation_time"] = "invalid-date"
+    invalid_data = reservation_create_json | {"reservation_time": "invalid-date"}
+
+    response = client.post("/api/reservations/", json=invalid_data)
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert "detail" in response.json()
+
+
+@pytest.mark.asyncio
+async def test_create_reservation_too_long(client):
+    invalid_data = reservation_create_json | {
+        "reservation_time": "2025-04-12T12:00:00",
+        "duration_minutes": 24 * 60 + 1,
+    }
 
     response = client.post("/api/reservations/", json=invalid_data)
 
@@ -177,4 +305,86 @@ async def test_delete_reservation_invalid_id(client):
     response = client.delete("/api/reservations/-1")
 
     assert response.status_code == status.HTTP_404_NOT_FOUND
-    assert "detail" in response.json()
\ No newline at end of file
+    assert "detail" in response.json()
+
+@pytest.mark.asyncio
+async def test_create_reservations_bulk_success(monkeypatch, client):
+    results = [ReservationBulkResult(index=0, status=BulkItemStatus.created, reservation=reservation)]
+    mock_create_reservations = AsyncMock(return_value=results)
+    monkeypatch.setattr(reservation_services, "create_reservations", mock_create_reservations)
+
+    response = client.post("/api/reservations/bulk", json=[reservation_create_json])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [results[0].model_dump(mode="json")]
+    assert mock_create_reservations.call_args.args[1] is True
+
+
+@pytest.mark.asyncio
+async def test_create_reservations_bulk_atomic_conflict(monkeypatch, client):
+    results = [
+        ReservationBulkResult(index=0, status=BulkItemStatus.skipped),
+        ReservationBulkResult(index=1, status=BulkItemStatus.conflict),
+    ]
+    mock_create_reservations = AsyncMock(return_value=results)
+    monkeypatch.setattr(reservation_services, "create_reservations", mock_create_reservations)
+
+    response = client.post(
+        "/api/reservations/bulk",
+        json=[reservation_create_json, reservation_create_json],
+    )
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert [item["status"] for item in response.json()] == ["skipped", "conflict"]
+
+
+@pytest.mark.asyncio
+async def test_create_reservations_bulk_atomic_table_deleted(monkeypatch, client):
+    mock_create_reservations = AsyncMock(side_effect=reservation_services.TableNotFoundError())
+    monkeypatch.setattr(reservation_services, "create_reservations", mock_create_reservations)
+
+    response = client.post("/api/reservations/bulk", json=[reservation_create_json])
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Table not found"}
+
+
+@pytest.mark.asyncio
+async def test_create_reservations_bulk_partial(monkeypatch, client):
+    results = [
+        ReservationBulkResult(index=0, status=BulkItemStatus.created, reservation=reservation),
+        ReservationBulkResult(index=1, status=BulkItemStatus.table_not_found),
+    ]
+    mock_create_reservations = AsyncMock(return_value=results)
+    monkeypatch.setattr(reservation_services, "create_reservations", mock_create_reservations)
+
+    response = client.post(
+        "/api/reservations/bulk",
+        params={"mode": "partial"},
+        json=[reservation_create_json, reservation_create_json],
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["status"] for item in response.json()] == ["created", "table_not_found"]
+    assert mock_create_reservations.call_args.args[1] is False
+
+
+@pytest.mark.asyncio
+async def test_create_reservations_bulk_empty(client):
+    response = client.post("/api/reservations/bulk", json=[])
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_fast_path(monkeypatch, client):
+    second = reservation.model_copy(update={"id": 2})
+    mock_get_reservation_rows = AsyncMock(return_value=[reservation.model_dump(), second.model_dump()])
+    monkeypatch.setattr(reservation_services, "get_reservation_rows", mock_get_reservation_rows)
+    monkeypatch.setattr(settings, "json_fast_path", True)
+
+    response = client.get("/api/reservations/", params={"limit": 1})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [reservation.model_dump(mode="json")]
+    assert "X-Next-Cursor" in response.headers
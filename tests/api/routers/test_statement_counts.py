@@ -0,0 +1,110 @@
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from fastapi import status
+
+from app.core import db
+from app.schemas.reservation import Reservation
+from app.schemas.table import Table
+
+
+class CountingSession:
+    """
+    Stands in for AsyncSession and records every statement sent to the database.
+    """
+
+    def __init__(self, result):
+        self.result = result
+        self.statements = []
+        self.commits = 0
+        self.info = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement)
+        return MagicMock(first=MagicMock(return_value=self.result))
+
+    async def scalar(self, statement, *args, **kwargs):
+        self.statements.append(statement)
+        return self.result
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+
+@pytest.fixture
+def counting_session(monkeypatch):
+    def use(result):
+        session = CountingSession(result)
+        monkeypatch.setattr(db, "async_sessionmaker", lambda: session)
+        return session
+
+    return use
+
+
+reservation = Reservation(
+    customer_name="John Doe",
+    reservation_time=datetime(2025, 4, 12, 12, 0, 0),
+    duration_minutes=60,
+    table_id=1,
+    id=1,
+)
+table = Table(id=1, name="Table 1", seats=4, location="Main Hall")
+
+
+@pytest.mark.asyncio
+async def test_create_reservation_statements(counting_session, client):
+    session = counting_session(reservation)
+
+    response = client.post("/api/reservations/", json={
+        "customer_name": "John Doe",
+        "reservation_time": "2025-04-12T12:00:00",
+        "duration_minutes": 60,
+        "table_id": 1,
+    })
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(session.statements) == 1
+    assert session.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_reservation_statements(counting_session, client):
+    session = counting_session(MagicMock(table_id=1))
+
+    response = client.delete("/api/reservations/1")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(session.statements) == 1
+    assert session.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_create_table_statements(counting_session, client):
+    session = counting_session(table)
+
+    response = client.post("/api/tables/", json={"name": "Table 1", "seats": 4, "location": "Main Hall"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(session.statements) == 1
+    assert session.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_table_statements(counting_session, client):
+    session = counting_session(1)
+
+    response = client.delete("/api/tables/1")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(session.statements) == 1
+    assert session.commits == 1
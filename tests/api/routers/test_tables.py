@@ -2,11 +2,13 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, MagicMock
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
+from datetime import date, datetime
 from app.main import app
 from app.models.table import Table
-from app.schemas.table import Table, TableCreate
+from app.schemas.table import Granularity, Table, TableCreate
+from app.core.settings import settings
 from app.services import table_services
+from app.services.tables_catalog import CatalogSnapshot, tables_catalog
 from fastapi import status
 
 client = TestClient(app)
@@ -48,6 +50,95 @@ async def test_get_tables_not_found(monkeypatch, client):
     assert response.json() == {"detail": "Tables not found"}
     mock_get_tables.assert_called_once()
 
+@pytest.mark.asyncio
+async def test_get_available_tables_success(monkeypatch, client):
+    mock_get_available = AsyncMock(return_value=[table])
+    monkeypatch.setattr(table_services, "get_available_tables", mock_get_available)
+
+    response = client.get(
+        "/api/tables/availability",
+        params={"start": "2025-04-12T12:00:00", "duration": 90, "seats": 3, "location": "Main Hall"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [table_create_json | {"id": 1}]
+    args = mock_get_available.call_args.args
+    assert args[:4] == (datetime(2025, 4, 12, 12, 0), 90, 3, "Main Hall")
+
+@pytest.mark.asyncio
+async def test_get_available_tables_not_found(monkeypatch, client):
+    mock_get_available = AsyncMock(return_value=[])
+    monkeypatch.setattr(table_services, "get_available_tables", mock_get_available)
+
+    response = client.get(
+        "/api/tables/availability",
+        params={"start": "2025-04-12T12:00:00", "duration": 90},
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Available tables not found"}
+
+@pytest.mark.asyncio
+async def test_get_available_tables_invalid_duration(client):
+    response = client.get(
+        "/api/tables/availability",
+        params={"start": "2025-04-12T12:00:00", "duration": 0},
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+@pytest.mark.asyncio
+async def test_get_utilization_success(monkeypatch, client):
+    row = {
+        "table_id": 1,
+        "location": "Main Hall",
+        "period_start": date(2025, 4, 1),
+        "booked_minutes": 720.0,
+        "reservations": 6,
+        "occupancy": 0.25,
+    }
+    mock_get_utilization = AsyncMock(return_value=[row])
+    monkeypatch.setattr(table_services, "get_utilization", mock_get_utilization)
+
+    response = client.get(
+        "/api/tables/utilization",
+        params={"from": "2025-04-01", "to": "2025-04-02", "granularity": "month"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [row | {"period_start": "2025-04-01"}]
+    assert mock_get_utilization.call_args.args[:4] == (
+        date(2025, 4, 1), date(2025, 4, 2), Granularity.month, None
+    )
+
+@pytest.mark.asyncio
+async def test_get_utilization_invalid_range(client):
+    response = client.get("/api/tables/utilization", params={"from": "2025-04-02", "to": "2025-04-01"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.mark.asyncio
+async def test_get_table_schedule_success(monkeypatch, client):
+    schedule = table_services._day_schedule(1, date(2025, 4, 12), "0" * 36 + "1" * 12 + "0" * 240)
+    mock_get_table_schedule = AsyncMock(return_value=schedule)
+    monkeypatch.setattr(table_services, "get_table_schedule", mock_get_table_schedule)
+
+    response = client.get("/api/tables/1/schedule", params={"date": "2025-04-12"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["busy"] == [{"start": "2025-04-12T03:00:00", "end": "2025-04-12T04:00:00"}]
+    assert len(response.json()["free"]) == 2
+    assert mock_get_table_schedule.call_args.args[:2] == (1, date(2025, 4, 12))
+
+@pytest.mark.asyncio
+async def test_get_table_schedule_not_found(monkeypatch, client):
+    monkeypatch.setattr(table_services, "get_table_schedule", AsyncMock(return_value=None))
+
+    response = client.get("/api/tables/999/schedule", params={"date": "2025-04-12"})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Table with id 999 not found"}
+
 @pytest.mark.asyncio
 async def test_create_table_success(monkeypatch, mock_session, client):
     mock_create_table = AsyncMock(return_value=table)
@@ -130,3 +221,44 @@ async def test_delete_table_invalid_id(client):
 
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert "detail" in response.json()
+
+@pytest.mark.asyncio
+async def test_get_tables_fast_path(monkeypatch, client):
+    mock_get_table_rows = AsyncMock(return_value=[table.model_dump()])
+    monkeypatch.setattr(table_services, "get_table_rows", mock_get_table_rows)
+    monkeypatch.setattr(settings, "json_fast_path", True)
+
+    response = client.get("/api/tables/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [table_create_json | {"id": 1}]
+    mock_get_table_rows.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_get_tables_cached_etag(monkeypatch, client):
+    snapshot = CatalogSnapshot(version=3, etag='"tables-3"', body=b'[{"id":1}]', is_empty=False)
+    monkeypatch.setattr(tables_catalog, "get", AsyncMock(return_value=snapshot))
+    monkeypatch.setattr(settings, "tables_cache_enabled", True)
+
+    response = client.get("/api/tables/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] == '"tables-3"'
+    assert response.json() == [{"id": 1}]
+
+    response = client.get("/api/tables/", headers={"If-None-Match": '"tables-2", "tables-3"'})
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == '"tables-3"'
+    assert response.content == b""
+
+@pytest.mark.asyncio
+async def test_get_tables_cached_not_found(monkeypatch, client):
+    snapshot = CatalogSnapshot(version=0, etag='"tables-0"', body=b"[]", is_empty=True)
+    monkeypatch.setattr(tables_catalog, "get", AsyncMock(return_value=snapshot))
+    monkeypatch.setattr(settings, "tables_cache_enabled", True)
+
+    response = client.get("/api/tables/")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Tables not found"}
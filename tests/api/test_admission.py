@@ -0,0 +1,48 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import status
+
+from app.core import admission
+from app.core.admission import AdmissionLimiter, OverloadedError
+from app.services import table_services
+
+
+@pytest.mark.asyncio
+async def test_limiter_rejects_when_queue_is_full():
+    limiter = AdmissionLimiter("test", limit=1, queue_size=1, queue_timeout=1)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(OverloadedError):
+        await limiter.acquire()
+
+    limiter.release()
+    await waiter
+    assert limiter.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_queue_deadline():
+    limiter = AdmissionLimiter("test", limit=1, queue_size=10, queue_timeout=0.01)
+    await limiter.acquire()
+
+    with pytest.raises(OverloadedError):
+        await limiter.acquire()
+    assert limiter.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_read_overload_is_shed_and_writes_admitted(monkeypatch, client):
+    monkeypatch.setattr(admission, "read_limiter", AdmissionLimiter("read", limit=0, queue_size=0, queue_timeout=1))
+    monkeypatch.setattr(admission, "write_limiter", AdmissionLimiter("write", limit=1, queue_size=0, queue_timeout=1))
+    monkeypatch.setattr(table_services, "create_table", AsyncMock(return_value=None))
+
+    response = client.get("/api/tables/")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["retry-after"] == "1"
+
+    response = client.post("/api/tables/", json={"name": "Table 1", "seats": 4, "location": "Hall"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,23 @@
+import pytest
+from fastapi import status
+
+from app.core.metrics import statement_label
+
+
+@pytest.mark.asyncio
+async def test_metrics_route_latency(client):
+    client.get("/api/health/pool")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert '/health/pool",status="200"}' in response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="' in response.text
+
+
+def test_statement_label():
+    assert statement_label("SELECT 1", {"query_label": "conflict_check"}) == "conflict_check"
+    assert statement_label('SELECT "table".id FROM "table"', {}) == "select_table"
+    assert statement_label("INSERT INTO reservation (id) VALUES ($1)", {}) == "insert_reservation"
+    assert statement_label("BEGIN", {}) == "other"
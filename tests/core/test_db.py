@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy.engine.interfaces import CacheStats
+
+from app.core import db
+from app.core.db import ReplicaLagMonitor
+
+
+@pytest.mark.asyncio
+async def test_replica_lag_is_cached_between_checks():
+    monitor = ReplicaLagMonitor(engine=None, check_interval=60)
+    monitor._measure = AsyncMock(return_value=0.5)
+
+    assert await monitor.lag() == 0.5
+    assert await monitor.lag() == 0.5
+    monitor._measure.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_falls_back_to_primary(monkeypatch):
+    replica = object()
+    monitor = ReplicaLagMonitor(engine=None, check_interval=60)
+    monkeypatch.setattr(db, "read_sessionmaker", replica)
+    monkeypatch.setattr(db, "replica_lag", monitor)
+    monkeypatch.setattr(db.settings, "db_read_max_lag_seconds", 5)
+
+    monitor._measure = AsyncMock(return_value=1)
+    assert await db.get_read_sessionmaker() is replica
+
+    monitor._checked_at = float("-inf")
+    monitor._measure = AsyncMock(return_value=30)
+    assert await db.get_read_sessionmaker() is db.async_sessionmaker
+
+
+@pytest.mark.asyncio
+async def test_replica_without_wal_receiver_counts_as_lagging():
+    monitor = ReplicaLagMonitor(engine=None, check_interval=60)
+    conn = AsyncMock(scalar=AsyncMock(return_value=None))
+    monitor.engine = SimpleNamespace(
+        connect=lambda: AsyncMock(__aenter__=AsyncMock(return_value=conn), __aexit__=AsyncMock(return_value=False))
+    )
+
+    assert await monitor.lag() == float("inf")
+
+
+@pytest.mark.asyncio
+async def test_hanging_replica_check_times_out():
+    monitor = ReplicaLagMonitor(engine=None, check_interval=60, timeout=0.01)
+
+    async def hang() -> float:
+        await asyncio.sleep(60)
+        return 0
+
+    monitor._query_lag = hang
+
+    assert await asyncio.wait_for(monitor.lag(), 1) == float("inf")
+
+
+def test_compiled_cache_outcome_is_counted():
+    context = SimpleNamespace(
+        query_started=time.perf_counter(),
+        execution_options={"query_label": "cache_test"},
+        cache_hit=CacheStats.CACHE_HIT,
+    )
+    before = REGISTRY.get_sample_value("db_compiled_cache_total", {"label": "cache_test", "result": "hit"}) or 0
+
+    db._record_query_time(None, None, "SELECT 1", None, context, False)
+
+    assert REGISTRY.get_sample_value("db_compiled_cache_total", {"label": "cache_test", "result": "hit"}) == before + 1
@@ -0,0 +1,93 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.schemas.reservation import BulkItemStatus, ReservationCreate
+from app.services import reservation_services as rs
+
+
+def integrity_error(sqlstate: str) -> IntegrityError:
+    return IntegrityError("INSERT", {}, SimpleNamespace(sqlstate=sqlstate))
+
+
+def reservations(count: int) -> list[ReservationCreate]:
+    return [
+        ReservationCreate(
+            customer_name="John Doe", reservation_time=datetime(2025, 4, 12, 12), duration_minutes=60, table_id=i,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def session_losing_insert(sqlstate: str, count: int) -> AsyncMock:
+    session = AsyncMock()
+    checked = [SimpleNamespace(idx=i, table_missing=False, is_conflict=False) for i in range(count)]
+    session.execute.return_value = MagicMock(all=MagicMock(return_value=checked))
+    session.scalars.side_effect = integrity_error(sqlstate)
+    session.begin_nested = MagicMock(return_value=MagicMock(
+        __aenter__=AsyncMock(), __aexit__=AsyncMock(return_value=False)
+    ))
+    return session
+
+
+@pytest.mark.asyncio
+async def test_atomic_insert_on_deleted_table_raises_table_not_found():
+    session = session_losing_insert(rs.FOREIGN_KEY_VIOLATION, 1)
+
+    with pytest.raises(rs.TableNotFoundError):
+        await rs.create_reservations(reservations(1), atomic=True, session=session)
+
+
+@pytest.mark.asyncio
+async def test_partial_fallback_maps_only_known_violations():
+    session = session_losing_insert(rs.FOREIGN_KEY_VIOLATION, 2)
+    session.scalar.side_effect = [integrity_error(rs.FOREIGN_KEY_VIOLATION), integrity_error(rs.EXCLUSION_VIOLATION)]
+
+    results = await rs.create_reservations(reservations(2), atomic=False, session=session)
+
+    assert [result.status for result in results] == [BulkItemStatus.table_not_found, BulkItemStatus.conflict]
+
+    session = session_losing_insert(rs.FOREIGN_KEY_VIOLATION, 1)
+    session.scalar.side_effect = integrity_error("23514")
+    with pytest.raises(IntegrityError):
+        await rs.create_reservations(reservations(1), atomic=False, session=session)
+
+
+@pytest.mark.asyncio
+async def test_created_rows_are_matched_to_items_not_by_position():
+    session = session_losing_insert(rs.FOREIGN_KEY_VIOLATION, 2)
+    returned = [
+        SimpleNamespace(
+            id=20 + i, customer_name="John Doe", table_id=i, reservation_time=datetime(2025, 4, 12, 12),
+            duration_minutes=60, end_time=datetime(2025, 4, 12, 13),
+        )
+        for i in (2, 1)
+    ]
+    session.scalars.side_effect = None
+    session.scalars.return_value = MagicMock(all=MagicMock(return_value=returned))
+
+    results = await rs.create_reservations(reservations(2), atomic=True, session=session)
+
+    assert [result.reservation.table_id for result in results] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_items_rejected_by_check_do_not_block_overlapping_ones():
+    session = AsyncMock()
+    session.execute.return_value = MagicMock(all=MagicMock(return_value=[
+        SimpleNamespace(idx=0, table_missing=True, is_conflict=False),
+        SimpleNamespace(idx=1, table_missing=False, is_conflict=False),
+    ]))
+    items = [
+        ReservationCreate(customer_name="John Doe", reservation_time=datetime(2025, 4, 12, 12), duration_minutes=60,
+                          table_id=1),
+        ReservationCreate(customer_name="Jane Doe", reservation_time=datetime(2025, 4, 12, 12, 30),
+                          duration_minutes=60, table_id=1),
+    ]
+
+    results = await rs.create_reservations(items, atomic=True, session=session)
+
+    assert [result.status for result in results] == [BulkItemStatus.table_not_found, BulkItemStatus.skipped]
@@ -0,0 +1,110 @@
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core import db
+from app.services import change_feed as feed
+from app.services.change_feed import ChangeFeed, Cursor
+
+
+def event(event_id: int, xid: int = 100, xmin: int = 100) -> dict:
+    return {
+        "id": event_id, "entity": "reservation", "op": "INSERT", "data": {"table_id": 1}, "xid": xid, "xmin": xmin,
+    }
+
+
+def notification(event_id: int, xid: int = 100, xmin: int = 100) -> str:
+    return json.dumps(event(event_id, xid, xmin))
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = MagicMock(__aenter__=AsyncMock(), __aexit__=AsyncMock(return_value=False))
+    monkeypatch.setattr(db, "async_sessionmaker", lambda: session)
+    return session
+
+
+def test_cursor_round_trip():
+    assert Cursor.parse(str(Cursor(100, 7))) == Cursor(100, 7)
+    assert Cursor.parse("7") is None
+    assert Cursor.parse(None) is None
+
+
+def test_notification_is_fanned_out_to_every_subscriber():
+    change_feed = ChangeFeed(queue_size=10)
+
+    with change_feed.subscribe() as first, change_feed.subscribe() as second:
+        change_feed.handle_notification(notification(7))
+
+        expected = (event(7), '{"id":7,"entity":"reservation","op":"INSERT","data":{"table_id":1}}')
+        assert first.get_nowait() == expected
+        assert second.get_nowait() == expected
+
+
+def test_full_queue_is_replaced_by_catch_up_marker():
+    change_feed = ChangeFeed(queue_size=2)
+
+    with change_feed.subscribe() as queue:
+        for event_id in (1, 2, 3):
+            change_feed.handle_notification(notification(event_id))
+
+        assert queue.get_nowait() is None
+        assert queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_resume_sends_missed_events_then_live_ones_once(monkeypatch, session):
+    change_feed = ChangeFeed(queue_size=10)
+    monkeypatch.setattr(feed, "change_feed", change_feed)
+    monkeypatch.setattr(feed, "event_exists", AsyncMock(return_value=True))
+    missed = event(6, xid=101, xmin=101)
+    monkeypatch.setattr(feed, "get_events_since", AsyncMock(side_effect=[[missed], []]))
+
+    stream = feed.stream_events(last_event_id="100:5")
+
+    assert (await stream.__anext__()).startswith("id: 101:6\nevent: reservation\n")
+    # Published while the client was catching up: 6 was already sent.
+    change_feed.handle_notification(json.dumps(missed))
+    change_feed.handle_notification(notification(7, xid=102, xmin=101))
+    assert (await stream.__anext__()).startswith("id: 101:7\n")
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_resume_sends_event_committed_after_a_later_one(monkeypatch, session):
+    change_feed = ChangeFeed(queue_size=10)
+    monkeypatch.setattr(feed, "change_feed", change_feed)
+    monkeypatch.setattr(feed, "event_exists", AsyncMock(return_value=True))
+    # Transaction 100 took id 10 but committed after transaction 101 took
+    # and committed id 11, so the client had seen only 11.
+    earlier = event(10, xid=100, xmin=100)
+    later = event(11, xid=101, xmin=100)
+    get_events_since = AsyncMock(side_effect=[[earlier, later], []])
+    monkeypatch.setattr(feed, "get_events_since", get_events_since)
+
+    stream = feed.stream_events(last_event_id="100:11")
+
+    assert (await stream.__anext__()).startswith('id: 100:10\nevent: reservation\ndata: {"id":10,')
+    # The log is read from the cursor's xmin, not from its id.
+    get_events_since.assert_awaited_once_with(100, 0, session.__aenter__.return_value)
+    # Written after both committed: nothing below 102 is missing any more.
+    change_feed.handle_notification(notification(11, xid=101, xmin=100))
+    change_feed.handle_notification(notification(12, xid=102, xmin=102))
+    change_feed.handle_notification(notification(10, xid=100, xmin=100))
+    change_feed.handle_notification(notification(13, xid=103, xmin=102))
+    assert (await stream.__anext__()).startswith("id: 102:12\n")
+    assert (await stream.__anext__()).startswith("id: 102:13\n")
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_resume_from_pruned_event_resets(monkeypatch, session):
+    monkeypatch.setattr(feed, "change_feed", ChangeFeed(queue_size=10))
+    monkeypatch.setattr(feed, "event_exists", AsyncMock(return_value=False))
+    monkeypatch.setattr(feed, "get_watermark", AsyncMock(return_value=Cursor(120, 42)))
+
+    stream = feed.stream_events(last_event_id="100:5")
+
+    assert await stream.__anext__() == "id: 120:42\nevent: reset\ndata: {}\n\n"
+    await stream.aclose()
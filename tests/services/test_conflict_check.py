@@ -0,0 +1,61 @@
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.schemas.reservation import ReservationCreate
+from app.services import reservation_services as rs
+from app.services.idempotency_services import IdempotencyRequest
+from app.services.slots import SLOTS_PER_DAY, bits_to_mask
+
+
+def test_window_params_cover_both_days_of_window():
+    params = rs.window_params(datetime(2025, 4, 12, 23, 30), 60)
+
+    assert params["first_day"] == date(2025, 4, 12)
+    assert params["next_day"] == date(2025, 4, 13)
+    assert bits_to_mask(params["first_mask"]) == 0b111111 << (SLOTS_PER_DAY - 6)
+    assert bits_to_mask(params["next_mask"]) == 0b1111111
+
+
+def test_same_day_window_has_empty_next_mask():
+    params = rs.window_params(datetime(2025, 4, 12, 12), 60)
+
+    assert params["end"] == datetime(2025, 4, 12, 13)
+    assert bits_to_mask(params["next_mask"]) == 0
+
+
+@pytest.mark.asyncio
+async def test_insert_skipped_by_slot_check_is_a_conflict():
+    session = AsyncMock()
+    session.scalar.return_value = None
+    reservation = ReservationCreate(
+        customer_name="John Doe", reservation_time=datetime(2025, 4, 12, 12), duration_minutes=60, table_id=1,
+    )
+
+    with pytest.raises(rs.ReservationConflictError):
+        await rs.create_reservation(reservation, session)
+
+    statement, params = session.scalar.call_args.args
+    assert statement is rs.INSERT_RESERVATION
+    assert params["start"] == datetime(2025, 4, 12, 12)
+    assert params["table_id"] == 1
+    session.rollback.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_conflict_with_idempotency_key_rolls_back_to_savepoint():
+    session = AsyncMock()
+    session.scalar.return_value = None
+    savepoint = MagicMock(__aenter__=AsyncMock(), __aexit__=AsyncMock(return_value=False))
+    session.begin_nested = MagicMock(return_value=savepoint)
+    reservation = ReservationCreate(
+        customer_name="John Doe", reservation_time=datetime(2025, 4, 12, 12), duration_minutes=60, table_id=1,
+    )
+
+    with pytest.raises(rs.ReservationConflictError):
+        await rs.create_reservation(reservation, session, IdempotencyRequest("reservations", "key", "hash"))
+
+    exc_type = savepoint.__aexit__.call_args.args[0]
+    assert exc_type is rs.ReservationConflictError
+    session.rollback.assert_not_called()
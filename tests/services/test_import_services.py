@@ -0,0 +1,86 @@
+import io
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import import_services
+from app.services.import_services import ImportFormat, read_rows
+
+
+def test_read_rows_ndjson_keeps_line_numbers():
+    file = io.StringIO('{"name": "A"}\n\nnot json\n{"name": "B"}\n')
+
+    assert list(read_rows(file, ImportFormat.ndjson)) == [(1, {"name": "A"}), (3, None), (4, {"name": "B"})]
+
+
+@pytest.mark.asyncio
+async def test_import_reservations_rejects_invalid_and_overlapping_rows(monkeypatch):
+    copy = AsyncMock()
+    monkeypatch.setattr(import_services, "_copy", copy)
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock(rowcount=1, __iter__=lambda self: iter([])))
+    file = io.StringIO(
+        "customer_name,reservation_time,duration_minutes,table_id\n"
+        "A,2025-04-12T12:00:00,60,1\n"
+        "B,2025-04-12T12:30:00,60,1\n"
+        "C,2025-04-12T12:30:00,0,2\n"
+        "D,2025-04-12T12:30:00,60,2\n"
+    )
+
+    report = await import_services.import_reservations(read_rows(file, ImportFormat.csv), session, batch_size=2)
+
+    assert report.rejected == {
+        3: "overlaps another reservation in the file",
+        4: "duration_minutes: Input should be greater than or equal to 1",
+    }
+    staged = [record for call in copy.call_args_list for record in call.args[2]]
+    assert [record[0] for record in staged] == [2, 3, 5]
+    assert staged[0][5] == datetime(2025, 4, 12, 13)
+    # Bookings are locked out before stored overlaps are checked.
+    statements = [str(call.args[0].compile(dialect=postgresql.dialect())) for call in session.execute.call_args_list]
+    assert statements[-5] == "LOCK TABLE reservation IN SHARE ROW EXCLUSIVE MODE"
+    assert statements[-4].endswith("FOR KEY SHARE")
+    # In-file overlaps are removed after the check against stored rows.
+    assert statements[-2].startswith("DELETE FROM reservation_import")
+
+
+@pytest.mark.asyncio
+async def test_import_reservations_ignores_overlaps_with_rejected_rows(monkeypatch):
+    monkeypatch.setattr(import_services, "_copy", AsyncMock())
+    checked = MagicMock(rowcount=1, __iter__=lambda self: iter([MagicMock(line=2, table_exists=False)]))
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=checked)
+    file = io.StringIO(
+        "customer_name,reservation_time,duration_minutes,table_id\n"
+        "A,2025-04-12T12:00:00,60,1\n"
+        "B,2025-04-12T12:30:00,60,1\n"
+    )
+
+    report = await import_services.import_reservations(read_rows(file, ImportFormat.csv), session)
+
+    assert report.rejected == {2: "table not found"}
+
+
+@pytest.mark.asyncio
+async def test_import_tables_stages_valid_rows_in_file_order(monkeypatch):
+    copy = AsyncMock()
+    monkeypatch.setattr(import_services, "_copy", copy)
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock(rowcount=2))
+    file = io.StringIO(
+        "name,seats,location\n"
+        "Window,2,Hall\n"
+        ",4,Hall\n"
+        "Terrace,6,Outside\n"
+    )
+
+    report = await import_services.import_tables(read_rows(file, ImportFormat.csv), session, batch_size=2)
+
+    assert report.imported == 2
+    assert report.rejected == {3: "name: String should have at least 1 character"}
+    staged = [record for call in copy.call_args_list for record in call.args[2]]
+    assert staged == [(2, "Window", 2, "Hall"), (4, "Terrace", 6, "Outside")]
+    insert = str(session.execute.call_args.args[0])
+    assert insert.startswith("INSERT INTO \"table\"") and "ORDER BY table_import.line" in insert
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+
+from app.services.intervals import sweep_conflicts
+
+start = datetime(2025, 4, 12, 12, 0)
+hour = timedelta(hours=1)
+
+
+def test_sweep_conflicts_per_key():
+    intervals = [
+        (1, start, start + hour),
+        (2, start, start + hour),
+        (1, start + hour / 2, start + 2 * hour),
+        (1, start + 3 * hour, start + 4 * hour),
+    ]
+
+    assert sweep_conflicts(intervals) == {2}
+
+
+def test_sweep_conflicts_inclusive_ends():
+    intervals = [
+        (1, start + hour, start + 2 * hour),
+        (1, start, start + hour),
+    ]
+
+    assert sweep_conflicts(intervals) == {0}
+
+
+def test_sweep_conflicts_keeps_earliest():
+    intervals = [
+        (1, start + hour / 2, start + hour),
+        (1, start, start + 3 * hour),
+        (1, start + 2 * hour, start + 4 * hour),
+    ]
+
+    assert sweep_conflicts(intervals) == {0, 2}
@@ -0,0 +1,25 @@
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.partition_services import add_months, detach_expired_partitions
+
+
+def test_add_months_crosses_years():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+@pytest.mark.asyncio
+async def test_detach_expired_partitions_keeps_retention_window():
+    session = AsyncMock()
+    session.scalars.return_value = MagicMock(all=MagicMock(return_value=[
+        "reservation_2026_07", "reservation_2026_08", "reservation_2026_09", "reservation_default",
+    ]))
+
+    detached = await detach_expired_partitions(2, session, today=date(2026, 10, 18))
+
+    assert detached == ["reservation_2026_07"]
+    statement = session.execute.call_args.args[0]
+    assert str(statement) == 'ALTER TABLE reservation DETACH PARTITION "reservation_2026_07"'
@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.schemas.reservation import BulkItemStatus, Reservation, ReservationBulkResult, ReservationCreate
+from app.services import reservation_services
+from app.services.reservation_batcher import ReservationBatcher
+
+
+def make_reservation(table_id: int) -> ReservationCreate:
+    return ReservationCreate(
+        customer_name="John Doe",
+        reservation_time=datetime(2025, 4, 12, 12, 0),
+        duration_minutes=60,
+        table_id=table_id,
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_creates_share_one_transaction(monkeypatch):
+    created = Reservation(id=1, **make_reservation(1).model_dump())
+    create_reservations = AsyncMock(return_value=[
+        ReservationBulkResult(index=0, status=BulkItemStatus.created, reservation=created),
+        ReservationBulkResult(index=1, status=BulkItemStatus.conflict),
+    ])
+    monkeypatch.setattr(reservation_services, "create_reservations", create_reservations)
+    batcher = ReservationBatcher(window_seconds=0.01, max_batch=10)
+
+    first, second = await asyncio.gather(
+        batcher.submit(make_reservation(1)),
+        batcher.submit(make_reservation(1)),
+        return_exceptions=True,
+    )
+
+    assert first == created
+    assert isinstance(second, reservation_services.ReservationConflictError)
+    create_reservations.assert_called_once()
+    assert len(create_reservations.call_args.args[0]) == 2
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_flushed_without_waiting(monkeypatch):
+    create_reservations = AsyncMock(return_value=[
+        ReservationBulkResult(index=0, status=BulkItemStatus.table_not_found),
+    ])
+    monkeypatch.setattr(reservation_services, "create_reservations", create_reservations)
+    batcher = ReservationBatcher(window_seconds=60, max_batch=1)
+
+    with pytest.raises(reservation_services.TableNotFoundError):
+        await asyncio.wait_for(batcher.submit(make_reservation(2)), timeout=1)
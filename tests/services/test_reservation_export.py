@@ -0,0 +1,58 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from app.services import reservation_services as rs
+
+
+class FakeConnection:
+    dialect = asyncpg_dialect()
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.copy_calls = []
+        self.invalidate = AsyncMock()
+
+    async def get_raw_connection(self):
+        return SimpleNamespace(driver_connection=self)
+
+    async def copy_from_query(self, query, *args, output, **options):
+        self.copy_calls.append((query, args, options))
+        for chunk in self.chunks:
+            await output(chunk)
+
+
+def session_for(connection):
+    return SimpleNamespace(connection=AsyncMock(return_value=connection))
+
+
+@pytest.mark.asyncio
+async def test_copy_passes_chunks_through(monkeypatch):
+    monkeypatch.setattr(rs, "EXPORT_QUEUE_SIZE", 1)
+    chunks = [b"id,customer_name\n", b"1,John\n", b"2,Jane\n"]
+    connection = FakeConnection(chunks)
+
+    exported = [chunk async for chunk in rs.copy_reservations_csv(
+        session_for(connection), time_from=datetime(2025, 4, 1)
+    )]
+
+    assert exported == chunks
+    query, args, options = connection.copy_calls[0]
+    assert "reservation.reservation_time >= $1" in query
+    assert args == (datetime(2025, 4, 1),)
+    assert options == {"format": "csv", "header": True}
+    connection.invalidate.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_abandoned_copy_invalidates_connection():
+    connection = FakeConnection([b"a\n"] * 100)
+    export = rs.copy_reservations_csv(session_for(connection))
+
+    assert await export.__anext__() == b"a\n"
+    await export.aclose()
+
+    connection.invalidate.assert_awaited_once()
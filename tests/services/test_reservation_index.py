@@ -0,0 +1,105 @@
+import json
+import time
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.listener import listener
+from app.services.reservation_index import ReservationIndex, TableSchedule
+
+start = datetime.now().replace(microsecond=0) + timedelta(days=1)
+
+
+@pytest.fixture(autouse=True)
+def connected(monkeypatch):
+    monkeypatch.setattr(listener, "_connected", True)
+
+
+def make_index() -> ReservationIndex:
+    index = ReservationIndex(horizon=timedelta(days=7), ttl_seconds=300)
+    index._schedules[1] = TableSchedule(
+        window_start=datetime.now(),
+        window_end=datetime.now() + timedelta(days=7),
+        loaded_at=time.monotonic(),
+        starts=[start],
+        ends=[start + timedelta(minutes=60)],
+    )
+    return index
+
+
+@pytest.mark.asyncio
+async def test_has_conflict_overlap(mock_session):
+    index = make_index()
+
+    assert await index.has_conflict(1, start + timedelta(minutes=30), 60, mock_session) is True
+    assert await index.has_conflict(1, start - timedelta(minutes=30), 30, mock_session) is True
+    assert await index.has_conflict(1, start + timedelta(minutes=61), 60, mock_session) is False
+
+
+@pytest.mark.asyncio
+async def test_has_conflict_outside_horizon(mock_session):
+    index = make_index()
+
+    assert await index.has_conflict(1, start + timedelta(days=30), 60, mock_session) is None
+    assert await index.has_conflict(1, datetime(2020, 1, 1), 60, mock_session) is None
+
+
+@pytest.mark.asyncio
+async def test_handle_notification(mock_session):
+    index = make_index()
+    other = start + timedelta(hours=3)
+    payload = {
+        "op": "INSERT",
+        "table_id": 1,
+        "start": other.isoformat(),
+        "end": (other + timedelta(minutes=60)).isoformat(),
+    }
+
+    index.handle_notification(json.dumps(payload))
+    index.handle_notification(json.dumps(payload))
+
+    assert index._schedules[1].starts == [start, other]
+    assert await index.has_conflict(1, other, 10, mock_session) is True
+
+    index.handle_notification(json.dumps(payload | {"op": "DELETE"}))
+
+    assert await index.has_conflict(1, other, 10, mock_session) is False
+
+
+@pytest.mark.asyncio
+async def test_expired_schedule_is_reloaded():
+    index = make_index()
+    index._schedules[1].loaded_at -= 301
+    session = AsyncMock()
+    session.execute.return_value.all = lambda: []
+
+    assert await index.has_conflict(1, start, 60, session) is False
+    session.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_bypassed_without_listener(mock_session, monkeypatch):
+    index = make_index()
+    monkeypatch.setattr(listener, "_connected", False)
+
+    assert await index.has_conflict(1, start + timedelta(minutes=30), 60, mock_session) is None
+    mock_session.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_clear_discards_schedules_loaded_before_reset():
+    index = make_index()
+    session = AsyncMock()
+
+    async def execute(*args, **kwargs):
+        index.clear()
+        result = AsyncMock()
+        result.all = lambda: []
+        return result
+
+    session.execute.side_effect = execute
+    del index._schedules[1]
+
+    assert await index.has_conflict(1, start, 60, session) is False
+    assert index._schedules == {}
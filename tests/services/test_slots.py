@@ -0,0 +1,39 @@
+from datetime import date, datetime
+
+from app.services.slots import SLOTS_PER_DAY, bits_to_mask, mask_to_bits, slot_runs, window_masks
+
+
+def test_window_masks_split_at_midnight():
+    masks = window_masks(datetime(2025, 4, 12, 23, 50), datetime(2025, 4, 13, 0, 10))
+
+    assert masks == {
+        date(2025, 4, 12): 0b11 << (SLOTS_PER_DAY - 2),
+        date(2025, 4, 13): 0b111,
+    }
+
+
+def test_touching_windows_share_a_slot():
+    # Overlap is inclusive at both ends, so a window ending at 19:00 and
+    # one starting at 19:00 must collide in the bitmap too.
+    first = window_masks(datetime(2025, 4, 12, 18), datetime(2025, 4, 12, 19))
+    second = window_masks(datetime(2025, 4, 12, 19), datetime(2025, 4, 12, 20))
+
+    assert first[date(2025, 4, 12)] & second[date(2025, 4, 12)]
+
+
+def test_bits_round_trip():
+    mask = window_masks(datetime(2025, 4, 12, 0, 5), datetime(2025, 4, 12, 0, 10))[date(2025, 4, 12)]
+
+    assert mask_to_bits(mask).startswith("0110")
+    assert bits_to_mask(mask_to_bits(mask)) == mask
+
+
+def test_slot_runs_merge_busy_and_free():
+    day = date(2025, 4, 12)
+    mask = window_masks(datetime(2025, 4, 12, 12), datetime(2025, 4, 12, 13, 55))[day]
+
+    assert slot_runs(mask, day, busy=True) == [(datetime(2025, 4, 12, 12), datetime(2025, 4, 12, 14))]
+    assert slot_runs(mask, day, busy=False) == [
+        (datetime(2025, 4, 12), datetime(2025, 4, 12, 12)),
+        (datetime(2025, 4, 12, 14), datetime(2025, 4, 13)),
+    ]
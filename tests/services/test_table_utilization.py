@@ -0,0 +1,31 @@
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.schemas.table import Granularity
+from app.services.table_services import get_utilization
+
+
+@pytest.mark.asyncio
+async def test_occupancy_counts_only_days_inside_range():
+    session = AsyncMock()
+    session.execute.return_value = [MagicMock(
+        table_id=1,
+        location="Main Hall",
+        period_start=datetime(2025, 3, 31),
+        booked_seconds=12 * 60 * 60,
+        reservations=3,
+    )]
+
+    # The week of 2025-03-31 is cut to 2025-04-01..2025-04-02 by the range.
+    rows = await get_utilization(date(2025, 4, 1), date(2025, 4, 2), Granularity.week, None, session)
+
+    assert rows == [{
+        "table_id": 1,
+        "location": "Main Hall",
+        "period_start": date(2025, 3, 31),
+        "booked_minutes": 720,
+        "reservations": 3,
+        "occupancy": 0.25,
+    }]
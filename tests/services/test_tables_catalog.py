@@ -0,0 +1,48 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.listener import listener
+from app.services import table_services
+from app.services.tables_catalog import TablesCatalog
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    monkeypatch.setattr(listener, "_connected", True)
+    monkeypatch.setattr(
+        table_services, "get_table_rows", AsyncMock(return_value=[{"id": 1}])
+    )
+    return TablesCatalog()
+
+
+@pytest.mark.asyncio
+async def test_catalog_is_cached_until_notified(catalog):
+    session = AsyncMock()
+    session.scalar.return_value = 5
+
+    first = await catalog.get(session)
+    second = await catalog.get(session)
+
+    assert first is second
+    assert first.etag == '"tables-5"'
+    assert first.body == b'[{"id":1}]'
+    session.scalar.assert_called_once()
+
+    session.scalar.return_value = 6
+    catalog.handle_notification("6")
+    third = await catalog.get(session)
+
+    assert third.etag == '"tables-6"'
+
+
+@pytest.mark.asyncio
+async def test_catalog_bypassed_without_listener(catalog, monkeypatch):
+    monkeypatch.setattr(listener, "_connected", False)
+    session = AsyncMock()
+    session.scalar.return_value = 1
+
+    await catalog.get(session)
+    await catalog.get(session)
+
+    assert session.scalar.call_count == 2
@@ -0,0 +1,62 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from app.services import warmup
+from app.services.warmup import fill_pool
+
+
+class FakeSession:
+    open_sessions = 0
+
+    def __init__(self):
+        self.rollback = AsyncMock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        FakeSession.open_sessions -= 1
+
+    async def connection(self):
+        FakeSession.open_sessions += 1
+
+
+@pytest.mark.asyncio
+async def test_fill_pool_checks_out_all_connections_before_preparing():
+    sessions = []
+    seen_open = []
+
+    def factory():
+        sessions.append(FakeSession())
+        return sessions[-1]
+
+    async def prepare(session):
+        seen_open.append(FakeSession.open_sessions)
+
+    await fill_pool(factory, 3, prepare)
+
+    assert seen_open[0] == 3
+    assert len(seen_open) == 3
+    assert FakeSession.open_sessions == 0
+    for session in sessions:
+        session.rollback.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_primary_warm_up_only_prepares_writes(monkeypatch):
+    monkeypatch.setattr(warmup, "_prepare_reads", AsyncMock())
+    driver_connection = MagicMock(prepare=AsyncMock())
+    connection = MagicMock(
+        dialect=dialect(),
+        get_raw_connection=AsyncMock(return_value=MagicMock(driver_connection=driver_connection)),
+    )
+    session = MagicMock(connection=AsyncMock(return_value=connection), execute=AsyncMock(), scalar=AsyncMock())
+
+    await warmup._prepare_primary(session)
+
+    prepared = [call.args[0] for call in driver_connection.prepare.await_args_list]
+    assert [sql.split()[0] for sql in prepared] == ["INSERT", "DELETE", "INSERT", "DELETE"]
+    session.execute.assert_not_awaited()
+    session.scalar.assert_not_awaited()